@@ -21,7 +21,6 @@ streamlit run app.py
 
 import streamlit as st
 import pandas as pd
-from openpyxl import load_workbook
 import io
 from typing import List, Dict, Optional
 import sys
@@ -44,6 +43,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Constantes de UI: se definen una vez y no en cada re-ejecución de Streamlit
+FREQ_EMOJI = {
+    'mensual': '📅',
+    'trimestral': '📆',
+    'irregular': '⚠️',
+    'sin_dividendos': '❌'
+}
+
+NAV_PAGES = (
+    "🏠 Inicio", "📥 Importar Excel", "🔍 Buscar Activo",
+    "📊 Ver Activos", "📈 Visualizaciones", "ℹ️ Estadísticas",
+    "🔧 Mantenimiento", "🏪 Gestión de Plataformas", "💼 Constructor de Portfolio"
+)
+
+# Bloques estáticos de la UI: se arman una vez al importar el módulo
+PAGE_CSS = """
+        <style>
+        .main-header {
+            font-size: 2.5rem;
+            font-weight: bold;
+            color: #1f77b4;
+            text-align: center;
+            margin-bottom: 2rem;
+        }
+        /* Asegurar que las métricas de Streamlit se muestren correctamente */
+        [data-testid="stMetricValue"] {
+            visibility: visible !important;
+            opacity: 1 !important;
+        }
+        [data-testid="stMetricLabel"] {
+            visibility: visible !important;
+            opacity: 1 !important;
+        }
+        </style>
+        """
+
+HEADER_HTML = f'<h1 class="main-header">{Config.PAGE_ICON} {Config.PAGE_TITLE}</h1>'
+
+WELCOME_MD = """
+        **Bienvenido a Dividend Hunter Pro**
+        
+        Esta aplicación te permite:
+        - 🔍 Buscar activos y analizar sus dividendos automáticamente
+        - 📥 Importar listas de tickers desde Excel
+        - 📊 Visualizar métricas financieras clave
+        - 💎 Encontrar "gemas" de inversión (alto yield, bajo costo)
+        - 📈 Analizar la frecuencia de pago de dividendos (Mensual vs Trimestral)
+        """
+
+# Filas por página en la tabla de activos guardados
+ASSETS_PAGE_SIZE = 100
+
+# Refrescos aproximados de la barra de progreso por proceso
+PROGRESS_UPDATES = 50
+
+
+def _progress_due(i: int, total: int) -> bool:
+    """
+    Indica si en la iteración `i` (base 0) toca refrescar el progreso.
+    
+    Cada refresco es un mensaje al navegador: con lotes grandes se actualiza
+    unas `PROGRESS_UPDATES` veces en lugar de una vez por fila.
+    """
+    return i % max(1, total // PROGRESS_UPDATES) == 0 or i >= total - 1
+
+
+@st.cache_resource
+def get_db(db_path: str) -> DatabaseManager:
+    """
+    Devuelve una única instancia de DatabaseManager por ruta de BD.
+    
+    Streamlit re-ejecuta el script en cada interacción; cachear el recurso
+    mantiene la conexión (y la caché de páginas de SQLite) entre ejecuciones.
+    """
+    return DatabaseManager(db_path)
+
+
+@st.cache_resource
+def get_analyzer() -> DividendAnalyzer:
+    """Devuelve una única instancia de DividendAnalyzer entre re-ejecuciones."""
+    return DividendAnalyzer()
+
 
 class DividendHunterApp:
     """
@@ -55,10 +136,10 @@ class DividendHunterApp:
     def __init__(self):
         """Inicializa todos los componentes de la aplicación."""
         try:
-            self.analyzer = DividendAnalyzer()
+            self.analyzer = get_analyzer()
             # Usar la misma ruta de BD para todas las instancias
             self.db_path = Config.DB_PATH
-            self.db = DatabaseManager(self.db_path)
+            self.db = get_db(self.db_path)
             # Pasar la misma ruta de BD al visualizador
             self.visualizer = FinancialVisualizer(self.db_path)
             self._setup_page()
@@ -78,42 +159,13 @@ class DividendHunterApp:
         )
         
         # CSS personalizado
-        st.markdown("""
-        <style>
-        .main-header {
-            font-size: 2.5rem;
-            font-weight: bold;
-            color: #1f77b4;
-            text-align: center;
-            margin-bottom: 2rem;
-        }
-        /* Asegurar que las métricas de Streamlit se muestren correctamente */
-        [data-testid="stMetricValue"] {
-            visibility: visible !important;
-            opacity: 1 !important;
-        }
-        [data-testid="stMetricLabel"] {
-            visibility: visible !important;
-            opacity: 1 !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(PAGE_CSS, unsafe_allow_html=True)
     
     def render_header(self):
         """Renderiza el encabezado principal."""
-        st.markdown(f'<h1 class="main-header">{Config.PAGE_ICON} {Config.PAGE_TITLE}</h1>', 
-                   unsafe_allow_html=True)
+        st.markdown(HEADER_HTML, unsafe_allow_html=True)
         st.markdown("---")
-        st.markdown("""
-        **Bienvenido a Dividend Hunter Pro**
-        
-        Esta aplicación te permite:
-        - 🔍 Buscar activos y analizar sus dividendos automáticamente
-        - 📥 Importar listas de tickers desde Excel
-        - 📊 Visualizar métricas financieras clave
-        - 💎 Encontrar "gemas" de inversión (alto yield, bajo costo)
-        - 📈 Analizar la frecuencia de pago de dividendos (Mensual vs Trimestral)
-        """)
+        st.markdown(WELCOME_MD)
     
     def render_sidebar(self):
         """Renderiza el sidebar con navegación."""
@@ -121,9 +173,7 @@ class DividendHunterApp:
         
         page = st.sidebar.radio(
             "Selecciona una opción:",
-            ["🏠 Inicio", "📥 Importar Excel", "🔍 Buscar Activo", 
-             "📊 Ver Activos", "📈 Visualizaciones", "ℹ️ Estadísticas", 
-             "🔧 Mantenimiento", "🏪 Gestión de Plataformas", "💼 Constructor de Portfolio"]
+            NAV_PAGES
         )
         
         st.sidebar.markdown("---")
@@ -144,17 +194,16 @@ class DividendHunterApp:
     def process_excel_file(self, uploaded_file) -> List[str]:
         """Procesa archivo Excel y extrae tickers."""
         try:
-            wb = load_workbook(io.BytesIO(uploaded_file.read()))
-            ws = wb.active
-            
-            tickers = []
-            for row in ws.iter_rows(min_row=1, values_only=True):
-                if row[0]:
-                    ticker = str(row[0]).strip().upper()
-                    if ErrorHandler.validate_ticker_symbol(ticker):
-                        tickers.append(ticker)
-            
-            return list(set(tickers))
+            # Solo la primera columna; pandas usa openpyxl en modo solo lectura
+            tickers = pd.read_excel(
+                io.BytesIO(uploaded_file.read()),
+                usecols=[0], header=None, engine='openpyxl', dtype=str
+            )[0]
+            tickers = tickers.dropna().str.strip().str.upper()
+            # Mismo criterio que ErrorHandler.validate_ticker_symbol, vectorizado
+            tickers = tickers[tickers.str.fullmatch(r'[A-Z0-9]{1,5}')]
+            # drop_duplicates conserva la primera aparición (orden del Excel)
+            return tickers.drop_duplicates().tolist()
         except Exception as e:
             logger.error(f"Error procesando Excel: {e}")
             st.error(f"❌ Error procesando archivo: {e}")
@@ -205,13 +254,17 @@ class DividendHunterApp:
         success_count = 0
         error_count = 0
         results = []
+        assets_to_save = []
+        pending_results = []
         
-        for i, ticker in enumerate(tickers):
-            status_text.text(f"Analizando {ticker}... ({i+1}/{len(tickers)})")
+        # Descargas en paralelo; los resultados llegan en orden de finalización
+        for i, (ticker, metrics) in enumerate(
+                self.analyzer.iter_asset_metrics(tickers, Config.MAX_FETCH_WORKERS)):
+            update_ui = _progress_due(i, len(tickers))
+            if update_ui:
+                status_text.text(f"Analizado {ticker} ({i+1}/{len(tickers)})")
             
             try:
-                metrics = self.analyzer.get_asset_metrics(ticker)
-                
                 if not metrics:
                     error_count += 1
                     logger.warning(f"No se obtuvieron métricas para {ticker}")
@@ -233,28 +286,16 @@ class DividendHunterApp:
                         'Frecuencia': 'N/A'
                     })
                 else:
-                    # Intentar guardar
-                    logger.info(f"Guardando {ticker} en BD...")
-                    if self.db.upsert_asset(metrics):
-                        success_count += 1
-                        logger.info(f"✅ {ticker} guardado exitosamente")
-                        results.append({
-                            'Ticker': ticker,
-                            'Estado': '✅ Exitoso',
-                            'Nombre': metrics.get('name', 'N/A'),
-                            'Yield': f"{metrics.get('dividend_yield', 0):.2f}%",
-                            'Frecuencia': metrics.get('dividend_frequency', 'N/A')
-                        })
-                    else:
-                        error_count += 1
-                        logger.error(f"❌ Error al guardar {ticker} en BD")
-                        results.append({
-                            'Ticker': ticker,
-                            'Estado': '❌ Error BD',
-                            'Nombre': metrics.get('name', 'N/A'),
-                            'Yield': f"{metrics.get('dividend_yield', 0):.2f}%",
-                            'Frecuencia': metrics.get('dividend_frequency', 'N/A')
-                        })
+                    # Se guarda al final, todo el lote en una sola transacción
+                    assets_to_save.append(metrics)
+                    pending_results.append({
+                        'Ticker': ticker,
+                        'Estado': '',
+                        'Nombre': metrics.get('name', 'N/A'),
+                        'Yield': f"{metrics.get('dividend_yield', 0):.2f}%",
+                        'Frecuencia': metrics.get('dividend_frequency', 'N/A')
+                    })
+                    results.append(pending_results[-1])
             except Exception as e:
                 logger.error(f"Error procesando {ticker}: {e}")
                 error_count += 1
@@ -266,7 +307,26 @@ class DividendHunterApp:
                     'Frecuencia': 'N/A'
                 })
             
-            progress_bar.progress((i + 1) / len(tickers))
+            if update_ui:
+                progress_bar.progress((i + 1) / len(tickers))
+        
+        # Guardar en BD: un único executemany y un solo commit para todo el lote
+        if assets_to_save:
+            status_text.text(f"Guardando {len(assets_to_save)} activos en BD...")
+            # Estado por activo según lo que realmente se guardó
+            saved_symbols = set(self.db.upsert_assets_bulk(assets_to_save))
+            saved_count = 0
+            for metrics, result in zip(assets_to_save, pending_results):
+                if metrics.get('symbol') in saved_symbols:
+                    saved_count += 1
+                    result['Estado'] = '✅ Exitoso'
+                else:
+                    result['Estado'] = '❌ Error BD'
+            success_count += saved_count
+            error_count += len(assets_to_save) - saved_count
+            logger.info(f"✅ {saved_count} activos guardados exitosamente")
+            if saved_count < len(assets_to_save):
+                logger.error(f"❌ {len(assets_to_save) - saved_count} activos no se guardaron en BD")
         
         status_text.empty()
         progress_bar.empty()
@@ -351,13 +411,7 @@ class DividendHunterApp:
             with col3:
                 st.metric("Dividendo Anual", format_currency(metrics['annual_dividend']))
             with col4:
-                freq_emoji = {
-                    'mensual': '📅',
-                    'trimestral': '📆',
-                    'irregular': '⚠️',
-                    'sin_dividendos': '❌'
-                }
-                emoji = freq_emoji.get(metrics['dividend_frequency'], '❓')
+                emoji = FREQ_EMOJI.get(metrics['dividend_frequency'], '❓')
                 st.metric("Frecuencia", 
                         f"{emoji} {metrics['dividend_frequency'].upper()}")
             
@@ -468,32 +522,27 @@ class DividendHunterApp:
         # Obtener activos
         try:
             freq_filter = None if filter_freq == "Todos" else filter_freq
-            
-            # Filtrar por plataforma si se seleccionó una
-            if filter_platform and filter_platform != "Todas":
-                assets = self.db.get_assets_by_platform(filter_platform)
-                # Aplicar filtro de frecuencia si es necesario
-                if freq_filter:
-                    assets = [a for a in assets if a.get('dividend_frequency') == freq_filter]
-            else:
-                assets = self.db.get_all_assets(freq_filter)
-            
-            logger.info(f"Obtenidos {len(assets)} activos de la BD (filtro: {freq_filter}, plataforma: {filter_platform})")
-            
-            # Filtrar por yield
-            if min_yield > 0:
-                assets = [a for a in assets if a.get('dividend_yield', 0) >= min_yield]
-                logger.info(f"Después de filtrar por yield >= {min_yield}: {len(assets)} activos")
-            
-            if assets:
-                # Convertir a DataFrame
-                df = pd.DataFrame(assets)
-                
+            platform_filter = None if filter_platform == "Todas" else filter_platform
+            
+            # Frecuencia, plataforma y yield se filtran en SQL; solo se traen
+            # las columnas que se muestran y las filas de la página actual
+            total_count = self.db.count_assets(freq_filter, platform_filter, min_yield)
+            total_pages = max(1, -(-total_count // ASSETS_PAGE_SIZE))
+            page = 1
+            if total_pages > 1:
+                page = st.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1)
+            offset = (page - 1) * ASSETS_PAGE_SIZE
+            df = self.db.get_all_assets_summary_df(freq_filter, platform_filter, min_yield,
+                                                   ASSETS_PAGE_SIZE, offset)
+            
+            logger.info(f"Obtenidos {len(df)} de {total_count} activos de la BD (filtro: {freq_filter}, plataforma: {filter_platform}, yield >= {min_yield}, página {page})")
+            
+            if not df.empty:
                 # Agregar columna de plataformas formateada
                 if 'platforms' in df.columns:
                     df['Plataformas'] = df['platforms'].apply(
                         lambda x: ', '.join([p.strip() for p in str(x).split(',') if p.strip()]) 
-                        if x and str(x) != 'nan' else 'Sin plataformas'
+                        if x and not pd.isna(x) else 'Sin plataformas'
                     )
                 else:
                     df['Plataformas'] = 'Sin plataformas'
@@ -512,7 +561,7 @@ class DividendHunterApp:
                     use_container_width=True
                 )
                 
-                st.success(f"📊 Total: {len(assets)} activos mostrados")
+                st.success(f"📊 Mostrando {offset + 1}-{offset + len(df)} de {total_count} activos (página {page} de {total_pages})")
             else:
                 st.warning("⚠️ No hay activos que cumplan los filtros. Usa 'Importar Excel' o 'Buscar Activo' para agregar datos.")
                 
@@ -774,34 +823,28 @@ class DividendHunterApp:
         error_count = 0
         results = []
         
-        for i, symbol in enumerate(symbols):
-            status_text.text(f"Actualizando {symbol}... ({i+1}/{len(symbols)})")
+        assets_to_save = []
+        pending_results = []
+        
+        # Obtener nuevas métricas (descargas en paralelo, sin caché: es una actualización)
+        for i, (symbol, metrics) in enumerate(
+                self.analyzer.iter_asset_metrics(symbols, Config.MAX_FETCH_WORKERS, use_cache=False)):
+            update_ui = _progress_due(i, len(symbols))
+            if update_ui:
+                status_text.text(f"Actualizado {symbol} ({i+1}/{len(symbols)})")
             
             try:
-                # Obtener nuevas métricas
-                metrics = self.analyzer.get_asset_metrics(symbol)
-                
                 if metrics and DataValidator.validate_asset_metrics(metrics):
-                    # Actualizar en BD (upsert actualizará el registro existente)
-                    if self.db.upsert_asset(metrics):
-                        success_count += 1
-                        results.append({
-                            'Símbolo': symbol,
-                            'Estado': '✅ Actualizado',
-                            'Precio': format_currency(metrics.get('current_price', 0)),
-                            'Yield': format_percentage(metrics.get('dividend_yield', 0)),
-                            'Frecuencia': metrics.get('dividend_frequency', 'N/A')
-                        })
-                        logger.info(f"✅ Actualizado: {symbol}")
-                    else:
-                        error_count += 1
-                        results.append({
-                            'Símbolo': symbol,
-                            'Estado': '❌ Error BD',
-                            'Precio': 'N/A',
-                            'Yield': 'N/A',
-                            'Frecuencia': 'N/A'
-                        })
+                    # Se guarda al final, todo el lote en una sola transacción
+                    assets_to_save.append(metrics)
+                    pending_results.append({
+                        'Símbolo': symbol,
+                        'Estado': '',
+                        'Precio': format_currency(metrics.get('current_price', 0)),
+                        'Yield': format_percentage(metrics.get('dividend_yield', 0)),
+                        'Frecuencia': metrics.get('dividend_frequency', 'N/A')
+                    })
+                    results.append(pending_results[-1])
                 else:
                     error_count += 1
                     results.append({
@@ -812,7 +855,7 @@ class DividendHunterApp:
                         'Frecuencia': 'N/A'
                     })
                     logger.warning(f"❌ No se pudieron obtener datos para {symbol}")
-                    
+            
             except Exception as e:
                 logger.error(f"Error actualizando {symbol}: {e}", exc_info=True)
                 error_count += 1
@@ -824,7 +867,26 @@ class DividendHunterApp:
                     'Frecuencia': 'N/A'
                 })
             
-            progress_bar.progress((i + 1) / len(symbols))
+            if update_ui:
+                progress_bar.progress((i + 1) / len(symbols))
+        
+        # Guardar en BD fuera del bucle de red: un único executemany y un solo commit
+        if assets_to_save:
+            status_text.text(f"Guardando {len(assets_to_save)} activos en BD...")
+            # Estado por activo según lo que realmente se guardó
+            saved_symbols = set(self.db.upsert_assets_bulk(assets_to_save))
+            saved_count = 0
+            for metrics, result in zip(assets_to_save, pending_results):
+                if metrics.get('symbol') in saved_symbols:
+                    saved_count += 1
+                    result['Estado'] = '✅ Actualizado'
+                else:
+                    result['Estado'] = '❌ Error BD'
+            success_count += saved_count
+            error_count += len(assets_to_save) - saved_count
+            logger.info(f"✅ {saved_count} activos actualizados")
+            if saved_count < len(assets_to_save):
+                logger.error(f"❌ {len(assets_to_save) - saved_count} activos no se guardaron en BD")
         
         status_text.empty()
         progress_bar.empty()
@@ -929,16 +991,23 @@ class DividendHunterApp:
         error_count = 0
         results = []
         
-        for i, symbol in enumerate(symbols):
-            status_text.text(f"Buscando {symbol}... ({i+1}/{len(symbols)})")
+        # Una sola consulta para saber cuáles ya existen (en vez de get_asset por símbolo)
+        existing_symbols = set(self.db.get_assets_many(symbols))
+        
+        assets_to_save = []
+        pending_results = []
+        
+        # Descargas en paralelo
+        for i, (symbol, metrics) in enumerate(
+                self.analyzer.iter_asset_metrics(symbols, Config.MAX_FETCH_WORKERS)):
+            update_ui = _progress_due(i, len(symbols))
+            if update_ui:
+                status_text.text(f"Buscado {symbol} ({i+1}/{len(symbols)})")
             
             try:
-                metrics = self.analyzer.get_asset_metrics(symbol)
-                
                 if metrics and DataValidator.validate_asset_metrics(metrics):
                     # Verificar que realmente no existe (doble verificación)
-                    existing = self.db.get_asset(symbol)
-                    if existing:
+                    if symbol in existing_symbols:
                         results.append({
                             'Símbolo': symbol,
                             'Estado': '⚠️ Ya existe',
@@ -947,26 +1016,16 @@ class DividendHunterApp:
                             'Frecuencia': metrics.get('dividend_frequency', 'N/A')
                         })
                     else:
-                        # Guardar nuevo activo
-                        if self.db.upsert_asset(metrics):
-                            success_count += 1
-                            results.append({
-                                'Símbolo': symbol,
-                                'Estado': '✅ Agregado',
-                                'Nombre': metrics.get('name', 'N/A'),
-                                'Yield': format_percentage(metrics.get('dividend_yield', 0)),
-                                'Frecuencia': metrics.get('dividend_frequency', 'N/A')
-                            })
-                            logger.info(f"✅ Nuevo activo agregado: {symbol}")
-                        else:
-                            error_count += 1
-                            results.append({
-                                'Símbolo': symbol,
-                                'Estado': '❌ Error BD',
-                                'Nombre': 'N/A',
-                                'Yield': 'N/A',
-                                'Frecuencia': 'N/A'
-                            })
+                        # Se guarda al final, todo el lote en una sola transacción
+                        assets_to_save.append(metrics)
+                        pending_results.append({
+                            'Símbolo': symbol,
+                            'Estado': '',
+                            'Nombre': metrics.get('name', 'N/A'),
+                            'Yield': format_percentage(metrics.get('dividend_yield', 0)),
+                            'Frecuencia': metrics.get('dividend_frequency', 'N/A')
+                        })
+                        results.append(pending_results[-1])
                 else:
                     error_count += 1
                     results.append({
@@ -976,7 +1035,7 @@ class DividendHunterApp:
                         'Yield': 'N/A',
                         'Frecuencia': 'N/A'
                     })
-                    
+            
             except Exception as e:
                 logger.error(f"Error buscando {symbol}: {e}", exc_info=True)
                 error_count += 1
@@ -988,7 +1047,26 @@ class DividendHunterApp:
                     'Frecuencia': 'N/A'
                 })
             
-            progress_bar.progress((i + 1) / len(symbols))
+            if update_ui:
+                progress_bar.progress((i + 1) / len(symbols))
+        
+        # Guardar en BD fuera del bucle de red: un único executemany y un solo commit
+        if assets_to_save:
+            status_text.text(f"Guardando {len(assets_to_save)} activos en BD...")
+            # Estado por activo según lo que realmente se guardó
+            saved_symbols = set(self.db.upsert_assets_bulk(assets_to_save))
+            saved_count = 0
+            for metrics, result in zip(assets_to_save, pending_results):
+                if metrics.get('symbol') in saved_symbols:
+                    saved_count += 1
+                    result['Estado'] = '✅ Agregado'
+                else:
+                    result['Estado'] = '❌ Error BD'
+            success_count += saved_count
+            error_count += len(assets_to_save) - saved_count
+            logger.info(f"✅ {saved_count} nuevos activos agregados")
+            if saved_count < len(assets_to_save):
+                logger.error(f"❌ {len(assets_to_save) - saved_count} activos no se guardaron en BD")
         
         status_text.empty()
         progress_bar.empty()
@@ -1166,87 +1244,94 @@ class DividendHunterApp:
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        for i, line in enumerate(lines):
-            status_text.text(f"Procesando línea {i+1}/{len(lines)}...")
-            
-            try:
-                # Formato: SYMBOL: PLATFORM1, PLATFORM2
-                if ':' in line:
-                    parts = line.split(':', 1)
-                    symbol = parts[0].strip().upper()
-                    platforms_str = parts[1].strip()
-                else:
-                    # Formato alternativo: SYMBOL PLATFORM1, PLATFORM2
-                    parts = line.split(None, 1)
-                    if len(parts) == 2:
+        # Una sola consulta para verificar existencia (en vez de get_asset por línea)
+        existing_symbols = set(self.db.get_all_symbols())
+        
+        # Un único commit para todo el lote
+        with self.db.transaction():
+            for i, line in enumerate(lines):
+                update_ui = _progress_due(i, len(lines))
+                if update_ui:
+                    status_text.text(f"Procesando línea {i+1}/{len(lines)}...")
+                
+                try:
+                    # Formato: SYMBOL: PLATFORM1, PLATFORM2
+                    if ':' in line:
+                        parts = line.split(':', 1)
                         symbol = parts[0].strip().upper()
                         platforms_str = parts[1].strip()
                     else:
+                        # Formato alternativo: SYMBOL PLATFORM1, PLATFORM2
+                        parts = line.split(None, 1)
+                        if len(parts) == 2:
+                            symbol = parts[0].strip().upper()
+                            platforms_str = parts[1].strip()
+                        else:
+                            error_count += 1
+                            results.append({
+                                'Línea': line[:50],
+                                'Estado': '❌ Formato inválido',
+                                'Plataformas': 'N/A'
+                            })
+                            continue
+                    
+                    # Validar símbolo
+                    if not ErrorHandler.validate_ticker_symbol(symbol):
                         error_count += 1
                         results.append({
-                            'Línea': line[:50],
-                            'Estado': '❌ Formato inválido',
-                            'Plataformas': 'N/A'
+                            'Símbolo': symbol,
+                            'Estado': '❌ Símbolo inválido',
+                            'Plataformas': platforms_str
                         })
                         continue
-                
-                # Validar símbolo
-                if not ErrorHandler.validate_ticker_symbol(symbol):
-                    error_count += 1
-                    results.append({
-                        'Símbolo': symbol,
-                        'Estado': '❌ Símbolo inválido',
-                        'Plataformas': platforms_str
-                    })
-                    continue
-                
-                # Verificar que el activo existe
-                asset = self.db.get_asset(symbol)
-                if not asset:
-                    error_count += 1
-                    results.append({
-                        'Símbolo': symbol,
-                        'Estado': '❌ Activo no encontrado',
-                        'Plataformas': platforms_str
-                    })
-                    continue
-                
-                # Procesar plataformas
-                platforms_list = [p.strip().upper() for p in platforms_str.split(',') if p.strip()]
-                
-                if platforms_list:
-                    if self.db.update_platforms(symbol, platforms_list):
-                        success_count += 1
+                    
+                    # Verificar que el activo existe
+                    if symbol not in existing_symbols:
+                        error_count += 1
                         results.append({
                             'Símbolo': symbol,
-                            'Estado': '✅ Actualizado',
-                            'Plataformas': ', '.join(platforms_list)
+                            'Estado': '❌ Activo no encontrado',
+                            'Plataformas': platforms_str
                         })
+                        continue
+                    
+                    # Procesar plataformas
+                    platforms_list = [p.strip().upper() for p in platforms_str.split(',') if p.strip()]
+                    
+                    if platforms_list:
+                        if self.db.update_platforms(symbol, platforms_list):
+                            success_count += 1
+                            results.append({
+                                'Símbolo': symbol,
+                                'Estado': '✅ Actualizado',
+                                'Plataformas': ', '.join(platforms_list)
+                            })
+                        else:
+                            error_count += 1
+                            results.append({
+                                'Símbolo': symbol,
+                                'Estado': '❌ Error BD',
+                                'Plataformas': platforms_str
+                            })
                     else:
                         error_count += 1
                         results.append({
                             'Símbolo': symbol,
-                            'Estado': '❌ Error BD',
+                            'Estado': '❌ Sin plataformas',
                             'Plataformas': platforms_str
                         })
-                else:
+                
+                except Exception as e:
+                    logger.error(f"Error procesando línea: {line}, Error: {e}")
                     error_count += 1
                     results.append({
-                        'Símbolo': symbol,
-                        'Estado': '❌ Sin plataformas',
-                        'Plataformas': platforms_str
+                        'Línea': line[:50],
+                        'Estado': f'❌ Error: {str(e)[:30]}',
+                        'Plataformas': 'N/A'
                     })
-                    
-            except Exception as e:
-                logger.error(f"Error procesando línea: {line}, Error: {e}")
-                error_count += 1
-                results.append({
-                    'Línea': line[:50],
-                    'Estado': f'❌ Error: {str(e)[:30]}',
-                    'Plataformas': 'N/A'
-                })
-            
-            progress_bar.progress((i + 1) / len(lines))
+                
+                if update_ui:
+                    progress_bar.progress((i + 1) / len(lines))
         
         status_text.empty()
         progress_bar.empty()
@@ -1310,90 +1395,101 @@ class DividendHunterApp:
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        for i, row in df.iterrows():
-            status_text.text(f"Procesando fila {i+1}/{len(df)}...")
-            
-            try:
-                # Primera columna: símbolo, Segunda columna: plataformas
-                symbol = str(row.iloc[0]).strip().upper()
-                platforms_str = str(row.iloc[1]) if len(row) > 1 else ""
-                
-                # Validar símbolo
-                if not symbol or symbol == 'nan':
-                    error_count += 1
-                    results.append({
-                        'Fila': i+2,
-                        'Símbolo': 'N/A',
-                        'Estado': '❌ Símbolo vacío',
-                        'Plataformas': 'N/A'
-                    })
-                    continue
-                
-                if not ErrorHandler.validate_ticker_symbol(symbol):
-                    error_count += 1
-                    results.append({
-                        'Fila': i+2,
-                        'Símbolo': symbol,
-                        'Estado': '❌ Símbolo inválido',
-                        'Plataformas': platforms_str
-                    })
-                    continue
-                
-                # Verificar que el activo existe
-                asset = self.db.get_asset(symbol)
-                if not asset:
-                    error_count += 1
-                    results.append({
-                        'Fila': i+2,
-                        'Símbolo': symbol,
-                        'Estado': '❌ Activo no encontrado',
-                        'Plataformas': platforms_str
-                    })
-                    continue
-                
-                # Procesar plataformas
-                if platforms_str and platforms_str != 'nan':
-                    platforms_list = [p.strip().upper() for p in str(platforms_str).split(',') if p.strip()]
-                else:
-                    platforms_list = []
+        # Una sola consulta para verificar existencia (en vez de get_asset por fila)
+        existing_symbols = set(self.db.get_assets_many(
+            df.iloc[:, 0].astype(str).str.strip().str.upper().tolist()
+        ))
+        
+        # Un único commit para todo el lote
+        with self.db.transaction():
+            for i, row in df.iterrows():
+                update_ui = _progress_due(i, len(df))
+                if update_ui:
+                    status_text.text(f"Procesando fila {i+1}/{len(df)}...")
                 
-                if platforms_list:
-                    if self.db.update_platforms(symbol, platforms_list):
-                        success_count += 1
+                try:
+                    # Primera columna: símbolo, Segunda columna: plataformas
+                    raw_symbol = row.iloc[0]
+                    symbol = "" if pd.isna(raw_symbol) else str(raw_symbol).strip().upper()
+                    raw_platforms = row.iloc[1] if len(row) > 1 else None
+                    platforms_str = "" if pd.isna(raw_platforms) else str(raw_platforms)
+                    
+                    # Validar símbolo
+                    if not symbol:
+                        error_count += 1
+                        results.append({
+                            'Fila': i+2,
+                            'Símbolo': 'N/A',
+                            'Estado': '❌ Símbolo vacío',
+                            'Plataformas': 'N/A'
+                        })
+                        continue
+                    
+                    if not ErrorHandler.validate_ticker_symbol(symbol):
+                        error_count += 1
                         results.append({
                             'Fila': i+2,
                             'Símbolo': symbol,
-                            'Estado': '✅ Actualizado',
-                            'Plataformas': ', '.join(platforms_list)
+                            'Estado': '❌ Símbolo inválido',
+                            'Plataformas': platforms_str
                         })
+                        continue
+                    
+                    # Verificar que el activo existe
+                    if symbol not in existing_symbols:
+                        error_count += 1
+                        results.append({
+                            'Fila': i+2,
+                            'Símbolo': symbol,
+                            'Estado': '❌ Activo no encontrado',
+                            'Plataformas': platforms_str
+                        })
+                        continue
+                    
+                    # Procesar plataformas
+                    if platforms_str:
+                        platforms_list = [p.strip().upper() for p in platforms_str.split(',') if p.strip()]
+                    else:
+                        platforms_list = []
+                    
+                    if platforms_list:
+                        if self.db.update_platforms(symbol, platforms_list):
+                            success_count += 1
+                            results.append({
+                                'Fila': i+2,
+                                'Símbolo': symbol,
+                                'Estado': '✅ Actualizado',
+                                'Plataformas': ', '.join(platforms_list)
+                            })
+                        else:
+                            error_count += 1
+                            results.append({
+                                'Fila': i+2,
+                                'Símbolo': symbol,
+                                'Estado': '❌ Error BD',
+                                'Plataformas': platforms_str
+                            })
                     else:
                         error_count += 1
                         results.append({
                             'Fila': i+2,
                             'Símbolo': symbol,
-                            'Estado': '❌ Error BD',
+                            'Estado': '❌ Sin plataformas',
                             'Plataformas': platforms_str
                         })
-                else:
+                
+                except Exception as e:
+                    logger.error(f"Error procesando fila {i+1}: {e}")
                     error_count += 1
                     results.append({
                         'Fila': i+2,
-                        'Símbolo': symbol,
-                        'Estado': '❌ Sin plataformas',
-                        'Plataformas': platforms_str
+                        'Símbolo': 'N/A',
+                        'Estado': f'❌ Error: {str(e)[:30]}',
+                        'Plataformas': 'N/A'
                     })
-                    
-            except Exception as e:
-                logger.error(f"Error procesando fila {i+1}: {e}")
-                error_count += 1
-                results.append({
-                    'Fila': i+2,
-                    'Símbolo': 'N/A',
-                    'Estado': f'❌ Error: {str(e)[:30]}',
-                    'Plataformas': 'N/A'
-                })
-            
-            progress_bar.progress((i + 1) / len(df))
+                
+                if update_ui:
+                    progress_bar.progress((i + 1) / len(df))
         
         status_text.empty()
         progress_bar.empty()
@@ -1493,7 +1589,7 @@ class DividendHunterApp:
         if filter_platform and filter_platform != "Todas":
             if filter_platform == "Sin plataforma":
                 filtered_assets = [a for a in filtered_assets 
-                                 if not a.get('platforms') or str(a.get('platforms', '')) == 'nan']
+                                 if not a.get('platforms') or pd.isna(a.get('platforms'))]
             else:
                 filtered_assets = self.db.get_assets_by_platform(filter_platform)
                 if filter_freq != "Todas":
@@ -1520,7 +1616,7 @@ class DividendHunterApp:
                 yield_val = asset.get('dividend_yield', 0)
                 freq = asset.get('dividend_frequency', 'N/A')
                 platforms = asset.get('platforms', '')
-                if platforms and str(platforms) != 'nan':
+                if platforms and not pd.isna(platforms):
                     platforms_str = ', '.join([p.strip() for p in str(platforms).split(',') if p.strip()])
                 else:
                     platforms_str = 'Sin plataforma'
@@ -1753,10 +1849,8 @@ class DividendHunterApp:
             st.info("💡 Ve a la pestaña '📋 Seleccionar Acciones' para agregar acciones o carga un portfolio guardado desde '💾 Portfolios Guardados'")
             return
         
-        # Obtener datos de las acciones seleccionadas
-        all_assets = self.db.get_all_assets()
-        selected_assets = [a for a in all_assets 
-                         if a['symbol'] in st.session_state.portfolio_selected]
+        # Obtener datos de las acciones seleccionadas (una sola consulta)
+        selected_assets = list(self.db.get_assets_many(st.session_state.portfolio_selected).values())
         
         if not selected_assets:
             st.error("❌ No se encontraron datos para las acciones seleccionadas")
@@ -2005,10 +2099,8 @@ class DividendHunterApp:
             st.info("💡 Ve a la pestaña '📋 Seleccionar Acciones' para agregar acciones o carga un portfolio guardado desde '💾 Portfolios Guardados'")
             return
         
-        # Obtener datos
-        all_assets = self.db.get_all_assets()
-        selected_assets = [a for a in all_assets 
-                         if a['symbol'] in st.session_state.portfolio_selected]
+        # Obtener datos (una sola consulta)
+        selected_assets = list(self.db.get_assets_many(st.session_state.portfolio_selected).values())
         
         if not selected_assets:
             st.error("❌ No se encontraron datos")
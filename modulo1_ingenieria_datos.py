@@ -29,10 +29,21 @@ que las APIs no resuelven por defecto.
 """
 
 import yfinance as yf
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import pandas as pd
 
+# Descargas simultáneas por defecto: las llamadas a yfinance esperan red, no CPU
+MAX_FETCH_WORKERS = 16
+
+# Caché de métricas por símbolo: evita repetir descargas del mismo ticker
+METRICS_CACHE_TTL = 3600  # Segundos; pasado este tiempo el precio se considera viejo
+METRICS_CACHE_SIZE = 512
+
 
 class DividendAnalyzer:
     """
@@ -46,6 +57,9 @@ class DividendAnalyzer:
     def __init__(self):
         """Inicializa el analizador sin dependencias externas."""
         self.lookback_months = 12  # Ventana de análisis: 12 meses
+        # {símbolo: (timestamp, métricas)}; el orden de inserción sirve para descartar los más viejos
+        self._metrics_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._metrics_cache_lock = threading.Lock()  # iter_asset_metrics usa varios hilos
     
     def get_ticker_data(self, symbol: str) -> Optional[yf.Ticker]:
         """
@@ -129,12 +143,44 @@ class DividendAnalyzer:
             print(f"Error analizando frecuencia de dividendos: {e}")
             return 'irregular'
     
-    def get_asset_metrics(self, symbol: str) -> Optional[Dict]:
+    def get_asset_metrics(self, symbol: str, use_cache: bool = True) -> Optional[Dict]:
         """
         Obtiene todas las métricas financieras relevantes de un activo.
         
+        Es el "punto de entrada" principal de este módulo. Los resultados
+        se cachean `METRICS_CACHE_TTL` segundos por símbolo, así que buscar
+        dos veces el mismo ticker (o tenerlo repetido en un Excel) no vuelve
+        a llamar a la API. Los errores (None) no se cachean.
+        
+        Args:
+            symbol: Símbolo del activo
+            use_cache: Si es False, siempre descarga datos nuevos (y refresca la caché)
+        
+        Returns:
+            Diccionario con métricas o None si hay error
+        """
+        key = symbol.upper()
+        if use_cache:
+            with self._metrics_cache_lock:
+                cached = self._metrics_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < METRICS_CACHE_TTL:
+                return copy.deepcopy(cached[1])
+        
+        metrics = self._fetch_asset_metrics(symbol)
+        
+        if metrics is not None:
+            with self._metrics_cache_lock:
+                self._metrics_cache.pop(key, None)
+                self._metrics_cache[key] = (time.monotonic(), copy.deepcopy(metrics))
+                if len(self._metrics_cache) > METRICS_CACHE_SIZE:
+                    del self._metrics_cache[next(iter(self._metrics_cache))]
+        return metrics
+    
+    def _fetch_asset_metrics(self, symbol: str) -> Optional[Dict]:
+        """
+        Descarga y analiza las métricas de un activo (sin caché).
+        
         Esta función orquesta la obtención de datos y el análisis.
-        Es el "punto de entrada" principal de este módulo.
         
         Args:
             symbol: Símbolo del activo
@@ -151,17 +197,16 @@ class DividendAnalyzer:
             # Obtener información básica del activo
             info = ticker.info
             
-            # Obtener precio actual (último precio de cierre)
-            hist = ticker.history(period="1d")
-            if hist.empty:
-                # Intentar obtener precio de info si no hay historial
-                current_price = info.get('currentPrice') or info.get('regularMarketPrice')
-                if current_price:
-                    current_price = float(current_price)
-                else:
+            # Obtener precio actual: `info` ya está descargado; el historial
+            # del último día es otra petición y solo se pide si info no trae precio
+            current_price = info.get('currentPrice') or info.get('regularMarketPrice')
+            if current_price:
+                current_price = float(current_price)
+            else:
+                hist = ticker.history(period="1d")
+                if hist.empty:
                     print(f"⚠️ No se pudo obtener precio para {symbol}")
                     return None
-            else:
                 current_price = float(hist['Close'].iloc[-1])
             
             # Análisis de dividendos (LA FUNCIÓN CLAVE)
@@ -187,9 +232,9 @@ class DividendAnalyzer:
                 # Extraer los meses únicos de las fechas de pago
                 payment_months = []
                 if not recent_dividends.empty:
-                    # Obtener meses únicos de las fechas de pago
+                    # Obtener meses únicos de las fechas de pago (set directo, sin lista intermedia)
                     payment_dates = recent_dividends.index
-                    payment_months = sorted(list(set([date.month for date in payment_dates])))
+                    payment_months = sorted(set(payment_dates.month.tolist()))
                 
                 # Dividend Yield = (Dividendos Anuales / Precio) * 100
                 dividend_yield = (annual_dividend / current_price * 100) if current_price else 0.0
@@ -218,6 +263,31 @@ class DividendAnalyzer:
         except Exception as e:
             print(f"Error obteniendo métricas para {symbol}: {e}")
             return None
+    
+    def iter_asset_metrics(self, symbols: List[str], max_workers: int = MAX_FETCH_WORKERS,
+                           use_cache: bool = True) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Obtiene las métricas de varios activos en paralelo.
+        
+        Cada `get_asset_metrics` pasa casi todo el tiempo esperando a la red,
+        así que se lanzan en un pool de hilos y se entregan a medida que
+        terminan (útil para ir actualizando una barra de progreso).
+        
+        Args:
+            symbols: Lista de símbolos
+            max_workers: Máximo de descargas simultáneas
+            use_cache: Ver `get_asset_metrics`
+        
+        Yields:
+            Tuplas (símbolo, métricas o None), en orden de finalización
+        """
+        if not symbols:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+            futures = {executor.submit(self.get_asset_metrics, symbol, use_cache): symbol
+                       for symbol in symbols}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
 
 
 # ============================================================================
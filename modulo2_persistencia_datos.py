@@ -27,13 +27,351 @@ pero queremos mantener un solo registro por activo.
 """
 
 import sqlite3
+import copy
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Optional, List
+from functools import lru_cache, wraps
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Optional, List, Tuple
 import json
+import re
+import threading
 import logging
+import numpy as np
+import pandas as pd
+
+# orjson (opcional): serialización JSON en C, devuelve bytes directamente
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads  # Acepta tanto str como bytes
 
 logger = logging.getLogger(__name__)
 
+# ----------------------------------------------------------------------------
+# SENTENCIAS SQL FRECUENTES
+# ----------------------------------------------------------------------------
+# sqlite3 guarda en caché las sentencias ya compiladas (clave = texto SQL).
+# Tenerlas como constantes garantiza que siempre se usa exactamente el mismo
+# texto y que la caché se aprovecha en cada llamada.
+
+_STATEMENT_CACHE_SIZE = 256
+
+# A partir de cuántas filas escritas en lote conviene refrescar las
+# estadísticas del planificador (ANALYZE)
+_BULK_ANALYZE_THRESHOLD = 100
+
+# Ajustes de conexión: WAL permite leer mientras se escribe y, con
+# synchronous=NORMAL, no hay fsync por cada commit (solo en los checkpoints)
+_SQL_CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -65536;
+"""
+
+# Conexiones de solo lectura: journal_mode es del archivo y no se puede
+# cambiar desde una conexión de solo lectura
+_SQL_READER_PRAGMAS = """
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -65536;
+"""
+
+# Modo rápido para importaciones puntuales: sin fsync y journal en memoria.
+# Un corte de luz a mitad de la importación puede corromper la BD.
+_SQL_FAST_MODE_PRAGMAS = """
+    PRAGMA journal_mode = MEMORY;
+    PRAGMA synchronous = OFF;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -65536;
+"""
+
+# Esquema de `assets`. WITHOUT ROWID: la tabla es un único B-tree ordenado
+# por `symbol`, así que buscar por símbolo es una sola búsqueda en el árbol.
+_SQL_CREATE_ASSETS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        symbol TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        sector TEXT,
+        industry TEXT,
+        current_price REAL,
+        annual_dividend REAL,
+        dividend_yield REAL,
+        dividend_frequency TEXT,
+        dividend_payment_months TEXT,
+        dividend_payment_months_mask INTEGER,
+        market_cap INTEGER,
+        platforms TEXT,
+        last_updated TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+"""
+
+# Columnas agregadas después de la primera versión del esquema
+_ASSETS_ADDED_COLUMNS = (
+    ('platforms', 'TEXT'),
+    ('dividend_payment_months', 'TEXT'),
+    ('dividend_payment_months_mask', 'INTEGER'),
+)
+
+# Índices de `assets` (se recrean tras migrar la tabla). El compuesto
+# (frecuencia, yield) resuelve "WHERE dividend_frequency = ? ORDER BY
+# dividend_yield DESC" sin ordenar y cubre el GROUP BY de get_stats; por eso
+# reemplaza al índice simple sobre dividend_frequency.
+_SQL_CREATE_ASSETS_INDEXES = """
+    DROP INDEX IF EXISTS idx_dividend_frequency;
+    CREATE INDEX IF NOT EXISTS idx_assets_frequency_yield ON assets(dividend_frequency, dividend_yield DESC);
+    CREATE INDEX IF NOT EXISTS idx_dividend_yield ON assets(dividend_yield);
+"""
+
+# Esquema completo, ejecutado con un único executescript al conectar
+_SQL_SCHEMA = _SQL_CREATE_ASSETS_TABLE.format(table='assets') + """;
+    
+    -- Tabla de plataformas normalizada (una fila por activo/plataforma).
+    -- La columna assets.platforms se mantiene como copia para mostrar.
+    CREATE TABLE IF NOT EXISTS asset_platforms (
+        symbol TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        PRIMARY KEY (platform, symbol)
+    ) WITHOUT ROWID;
+    
+    CREATE INDEX IF NOT EXISTS idx_asset_platforms_symbol ON asset_platforms(symbol);
+    
+    CREATE TABLE IF NOT EXISTS portfolios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        description TEXT,
+        selected_symbols BLOB NOT NULL,
+        shares_data BLOB NOT NULL,
+        tax_rates_data BLOB NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+""" + _SQL_CREATE_ASSETS_INDEXES
+
+# Orden de los parámetros de escritura de un activo (tupla posicional del upsert).
+_ASSET_WRITE_COLUMNS = (
+    'symbol', 'name', 'sector', 'industry', 'current_price',
+    'annual_dividend', 'dividend_yield', 'dividend_frequency',
+    'dividend_payment_months', 'dividend_payment_months_mask',
+    'market_cap', 'platforms', 'last_updated',
+)
+_ASSET_WRITE_DEFAULTS = dict.fromkeys(_ASSET_WRITE_COLUMNS)
+_asset_write_getter = itemgetter(*_ASSET_WRITE_COLUMNS)
+
+# Columnas que deciden si una fila cambió; last_updated queda fuera para que
+# re-importar los mismos datos solo actualice la fecha, sin reescribir la fila
+_ASSET_COMPARE_COLUMNS = _ASSET_WRITE_COLUMNS[:-1]
+_PLATFORMS_WRITE_INDEX = _ASSET_WRITE_COLUMNS.index('platforms')
+
+_SQL_INSERT_ASSET = """
+    INSERT INTO assets 
+    (symbol, name, sector, industry, current_price, 
+     annual_dividend, dividend_yield, dividend_frequency, 
+     dividend_payment_months, dividend_payment_months_mask,
+     market_cap, platforms, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Upsert en una sola sentencia (mismos parámetros que INSERT); platforms None conserva el valor
+_SQL_UPSERT_ASSET = _SQL_INSERT_ASSET + """
+    ON CONFLICT(symbol) DO UPDATE SET
+        name = excluded.name,
+        sector = excluded.sector,
+        industry = excluded.industry,
+        current_price = excluded.current_price,
+        annual_dividend = excluded.annual_dividend,
+        dividend_yield = excluded.dividend_yield,
+        dividend_frequency = excluded.dividend_frequency,
+        dividend_payment_months = excluded.dividend_payment_months,
+        dividend_payment_months_mask = excluded.dividend_payment_months_mask,
+        market_cap = excluded.market_cap,
+        platforms = COALESCE(excluded.platforms, assets.platforms),
+        last_updated = excluded.last_updated
+"""
+
+# Activo sin cambios en un lote: solo se registra la fecha de la consulta
+_SQL_TOUCH_ASSET = "UPDATE assets SET last_updated = ? WHERE symbol = ?"
+
+_SQL_GET_ASSET = "SELECT * FROM assets WHERE symbol = ?"
+
+_SQL_GET_ALL_ASSETS = """
+    SELECT * FROM assets 
+    ORDER BY dividend_yield DESC
+"""
+
+_SQL_GET_ASSETS_BY_FREQUENCY = """
+    SELECT * FROM assets 
+    WHERE dividend_frequency = ?
+    ORDER BY dividend_yield DESC
+"""
+
+# Columnas que consumen la UI y los gráficos (evita SELECT * + dict por fila)
+_ASSET_DF_COLUMNS = (
+    'symbol', 'name', 'sector', 'industry', 'current_price', 'annual_dividend',
+    'dividend_yield', 'dividend_frequency', 'dividend_payment_months_mask',
+    'market_cap', 'platforms', 'last_updated'
+)
+
+# Columnas numéricas de `_ASSET_DF_COLUMNS` (se construyen como float64)
+_ASSET_DF_FLOAT_COLUMNS = frozenset(
+    {'current_price', 'annual_dividend', 'dividend_yield', 'market_cap'}
+)
+
+# Las que solo se muestran con 2 decimales bajan a float32 (mitad de bytes hacia Plotly)
+_ASSET_DF_FLOAT32_COLUMNS = frozenset({'current_price', 'dividend_yield'})
+
+# Categorías de frecuencia en orden fijo (otras que aparezcan se agregan al final)
+_FREQUENCY_CATEGORIES = ('mensual', 'trimestral', 'irregular', 'sin_dividendos')
+
+# Columnas de la tabla "Activos Guardados" (las que realmente se muestran)
+_ASSET_SUMMARY_COLUMNS = (
+    'symbol', 'name', 'current_price', 'dividend_yield',
+    'dividend_frequency', 'platforms', 'sector', 'last_updated'
+)
+
+# Máximo de parámetros por consulta IN (...) (SQLite antiguo admite 999)
+_IN_CHUNK_SIZE = 500
+
+_SQL_GET_ALL_SYMBOLS = "SELECT symbol FROM assets ORDER BY symbol"
+
+_SQL_UPDATE_PLATFORMS = """
+    UPDATE assets 
+    SET platforms = ?
+    WHERE symbol = ?
+"""
+
+_SQL_GET_PLATFORMS = """
+    SELECT platform FROM asset_platforms
+    WHERE symbol = ?
+    ORDER BY platform
+"""
+
+_SQL_GET_ALL_PLATFORMS = "SELECT DISTINCT platform FROM asset_platforms ORDER BY platform"
+
+_SQL_DELETE_ASSET_PLATFORMS = "DELETE FROM asset_platforms WHERE symbol = ?"
+
+_SQL_INSERT_ASSET_PLATFORM = "INSERT OR IGNORE INTO asset_platforms (symbol, platform) VALUES (?, ?)"
+
+_SQL_GET_ASSETS_BY_PLATFORM = """
+    SELECT a.* FROM assets a
+    JOIN asset_platforms p ON a.symbol = p.symbol
+    WHERE p.platform = ?
+    ORDER BY a.dividend_yield DESC
+"""
+
+_SQL_GET_ASSETS_BY_PAYMENT_MONTH = """
+    SELECT * FROM assets 
+    WHERE (dividend_payment_months_mask & ?) != 0
+    ORDER BY dividend_yield DESC
+"""
+
+
+@lru_cache(maxsize=4096)
+def _decode_payment_months_mask(mask: int) -> Tuple[int, ...]:
+    """
+    Decodifica un bitmask de meses (bit i = mes i+1) a tupla ordenada.
+    
+    Solo existen 4096 máscaras posibles, así que cada una se calcula una vez.
+    Devuelve tupla (inmutable) porque el resultado se comparte entre llamadas.
+    """
+    return tuple(i + 1 for i in range(12) if mask >> i & 1)
+
+
+# Texto CSV de cada una de las 4096 máscaras posibles ("1,4,7,10"), indexado por máscara
+_MASK_TO_CSV: Tuple[str, ...] = tuple(
+    ",".join(str(i + 1) for i in range(12) if mask >> i & 1) for mask in range(4096)
+)
+
+# Tupla de meses de cada máscara, como Series para decodificar una columna
+# entera con `Series.map` (búsqueda por índice, sin llamar a Python por fila)
+_MASK_TO_MONTHS = pd.Series(
+    [_decode_payment_months_mask(mask) for mask in range(4096)], dtype=object
+)
+
+# Un mes válido (1-12) como número aislado; admite ceros a la izquierda ("01")
+_MONTH_RE = re.compile(r'(?<!\d)0*(1[0-2]|[1-9])(?!\d)')
+
+
+@lru_cache(maxsize=4096)
+def _parse_payment_months_str(months_str: str) -> Tuple[int, ...]:
+    """
+    Parsea un string de meses ("1,4,7,10") a tupla ordenada y sin duplicados.
+    
+    En la práctica hay pocas combinaciones distintas, así que casi todas las
+    llamadas salen de la caché.
+    """
+    return tuple(sorted({int(m) for m in _MONTH_RE.findall(months_str)}))
+
+
+# Máximo de combinaciones de argumentos cacheadas por método
+_READ_CACHE_MAX_ENTRIES = 32
+
+
+def _cached_until_write(method):
+    """
+    Memoiza un método de lectura hasta la próxima escritura.
+    
+    La versión de los datos sale de `data_version()`: combina `self._gen`
+    (se incrementa en cada escritura de esta instancia) con `PRAGMA
+    data_version` (cambia cuando otra conexión confirma cambios en el mismo
+    archivo). Si el método recibe argumentos
+    (deben ser hashables) se cachea cada combinación por separado. Se
+    devuelven copias para que el llamador no pueda modificar el valor cacheado.
+    """
+    name = method.__name__
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            version = self.data_version()
+        except sqlite3.Error:
+            return method(self, *args, **kwargs)
+        
+        cache_key = (name, args, tuple(sorted(kwargs.items())))
+        with self._cache_lock:
+            cached = self._read_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return copy.deepcopy(cached[1])
+        
+        result = method(self, *args, **kwargs)
+        # No cachear resultados vacíos (pueden venir de un error)
+        empty = result.empty if isinstance(result, pd.DataFrame) else not result
+        if not empty:
+            entry = (version, copy.deepcopy(result))
+            # La instancia se comparte entre hilos de Streamlit: la expulsión
+            # itera el dict, así que inserción y expulsión van bajo el lock
+            with self._cache_lock:
+                self._read_cache.pop(cache_key, None)
+                self._read_cache[cache_key] = entry
+                if len(self._read_cache) > _READ_CACHE_MAX_ENTRIES:
+                    self._read_cache.pop(next(iter(self._read_cache)), None)
+        return result
+    return wrapper
+
+
+def _serialized(method):
+    """
+    Ejecuta un método de escritura con el lock de la instancia tomado.
+    
+    Una misma instancia puede compartirse entre hilos (Streamlit re-ejecuta
+    cada sesión en hilos distintos); el lock evita que las escrituras de un
+    hilo se mezclen con una transacción abierta por otro.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DatabaseManager:
     """
@@ -44,40 +382,230 @@ class DatabaseManager:
     - El resto de la aplicación no necesita conocer SQL
     """
     
-    def __init__(self, db_path: str = "dividend_hunter.db"):
+    def __init__(self, db_path: str = "dividend_hunter.db", fast_mode: bool = False):
         """
         Inicializa la conexión a la base de datos.
         
         Args:
             db_path: Ruta al archivo de base de datos SQLite
+            fast_mode: Si es True, desactiva fsync y usa journal en memoria
+                (solo para importaciones puntuales; no es seguro ante cortes)
         """
         self.db_path = db_path
+        self.fast_mode = fast_mode
         self.conn = None
+        # Generación de escrituras: invalida las lecturas cacheadas
+        self._gen = 0
+        self._read_cache: Dict[Tuple[str, Tuple, Tuple], Tuple[Tuple[int, int], object]] = {}
+        self._cache_lock = threading.Lock()
+        # True dentro de `transaction()`: las escrituras no hacen commit propio
+        self._in_tx = False
+        # Serializa escrituras y transacciones si la instancia se comparte entre hilos
+        self._lock = threading.RLock()
+        # Hilo dueño de la transacción abierta (lee por la conexión de escritura)
+        self._tx_thread: Optional[int] = None
+        # Conexiones de solo lectura, una por hilo vivo: con WAL las lecturas de
+        # distintas sesiones no esperan al lock ni a la conexión de escritura.
+        # Se guarda el objeto Thread para detectar hilos muertos e idents reusados
+        self._readers: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._readers_lock = threading.Lock()
         self._initialize_database()
     
     def _ensure_connection(self):
         """
-        Asegura que la conexión a la BD esté abierta.
+        Asegura que exista una conexión a la BD.
         
-        En Streamlit, las conexiones pueden cerrarse entre ejecuciones,
-        por lo que necesitamos verificar y restaurar la conexión si es necesario.
+        No se hace ninguna consulta de verificación: si la conexión se cerró
+        (algo que puede pasar en Streamlit entre ejecuciones), `_execute` lo
+        detecta al primer uso y reconecta.
         """
+        if self.conn is None:
+            self._initialize_database()
+    
+    def _reconnect(self):
+        """Descarta la conexión actual y abre una nueva."""
         try:
-            if self.conn is None:
-                self._initialize_database()
-            else:
-                # Verificar si la conexión sigue activa haciendo una consulta simple
-                cursor = self.conn.cursor()
-                cursor.execute("SELECT 1")
-                cursor.fetchone()
-        except (sqlite3.Error, AttributeError, sqlite3.ProgrammingError):
-            # La conexión se cerró o hay un error, reinicializar
+            if self.conn:
+                self.conn.close()
+        except sqlite3.Error:
+            pass
+        self.conn = None
+        self._close_readers()
+        # data_version no es comparable entre conexiones distintas
+        with self._cache_lock:
+            self._read_cache.clear()
+        self._gen += 1
+        self._initialize_database()
+    
+    def data_version(self) -> Tuple[int, int]:
+        """
+        Versión actual de los datos, para invalidar cachés externas.
+        
+        Cambia con cada escritura de esta instancia, con cada commit de otra
+        conexión sobre el mismo archivo y al reconectar.
+        
+        Returns:
+            Tupla comparable (generación local, PRAGMA data_version)
+        
+        Raises:
+            sqlite3.Error: Si no se puede consultar la BD
+        """
+        # Bajo el lock: las escrituras suben _gen antes de su commit, y una
+        # versión leída en medio dejaría cachear datos viejos con _gen nuevo.
+        # PRAGMA data_version solo es comparable dentro de una misma conexión,
+        # por eso se consulta siempre en la de escritura
+        with self._lock:
+            return (self._gen, self._execute("PRAGMA data_version").fetchone()[0])
+    
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """
+        Ejecuta una sentencia con reconexión perezosa.
+        
+        Si la conexión estaba cerrada, reconecta y reintenta exactamente
+        una vez. Cualquier otro error se propaga al llamador.
+        
+        Args:
+            sql: Sentencia SQL
+            params: Parámetros de la sentencia
+        
+        Returns:
+            Cursor con el resultado
+        """
+        self._ensure_connection()
+        try:
+            return self.conn.execute(sql, params)
+        except sqlite3.ProgrammingError as e:
+            if 'closed' not in str(e).lower():
+                raise
+            logger.warning("Conexión a la BD cerrada, reconectando...")
+            self._reconnect()
+            return self.conn.execute(sql, params)
+    
+    def _read_execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """
+        Ejecuta una consulta de lectura en la conexión de solo lectura del hilo.
+        
+        Dentro de una transacción abierta por este mismo hilo (o con una BD
+        en memoria) se usa la conexión de escritura, para ver los cambios
+        todavía no confirmados.
+        
+        Args:
+            sql: Consulta SQL
+            params: Parámetros de la consulta
+        
+        Returns:
+            Cursor con el resultado
+        """
+        thread_id = threading.get_ident()
+        if self.db_path == ":memory:" or self._tx_thread == thread_id:
+            return self._execute(sql, params)
+        
+        current = threading.current_thread()
+        entry = self._readers.get(thread_id)
+        if entry is not None and entry[0] is current:
+            reader = entry[1]
+        else:
             try:
-                if self.conn:
-                    self.conn.close()
-            except:
+                reader = sqlite3.connect(
+                    f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                    uri=True,
+                    cached_statements=_STATEMENT_CACHE_SIZE,
+                    check_same_thread=False
+                )
+                reader.row_factory = sqlite3.Row
+                reader.executescript(_SQL_READER_PRAGMAS)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ No se pudo abrir conexión de lectura, usando la principal: {e}")
+                return self._execute(sql, params)
+            self._prune_readers()
+            with self._readers_lock:
+                self._readers[thread_id] = (current, reader)
+        return reader.execute(sql, params)
+    
+    def _prune_readers(self):
+        """
+        Cierra las conexiones de lectura de hilos que ya terminaron.
+        
+        Streamlit ejecuta cada rerun en un hilo nuevo; sin esta limpieza la
+        instancia compartida acumularía una conexión por rerun. También
+        descarta la entrada de un ident reutilizado por otro hilo.
+        """
+        current = threading.current_thread()
+        with self._readers_lock:
+            stale = [thread_id for thread_id, (thread, _) in self._readers.items()
+                     if not thread.is_alive() or (thread_id == current.ident and thread is not current)]
+            readers = [self._readers.pop(thread_id)[1] for thread_id in stale]
+        for reader in readers:
+            try:
+                reader.close()
+            except sqlite3.Error:
                 pass
-            self._initialize_database()
+    
+    def _close_readers(self):
+        """Cierra las conexiones de solo lectura de todos los hilos."""
+        with self._readers_lock:
+            readers, self._readers = self._readers, {}
+        for _, reader in readers.values():
+            try:
+                reader.close()
+            except sqlite3.Error:
+                pass
+    
+    def _commit(self):
+        """Confirma los cambios, salvo dentro de `transaction()` (commit diferido)."""
+        if not self._in_tx:
+            self.conn.commit()
+    
+    def _rollback(self):
+        """
+        Deshace los cambios, salvo dentro de `transaction()`.
+        
+        Dentro de una transacción explícita un rollback descartaría todo el
+        lote; la sentencia que falló ya es atómica por sí sola.
+        """
+        if not self._in_tx:
+            self.conn.rollback()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias escrituras en una sola transacción.
+        
+        Dentro del bloque, `upsert_asset`, `update_platforms`, `delete_asset`,
+        etc. no confirman por su cuenta: se hace un único commit al salir
+        (o rollback si se lanza una excepción). Los bloques anidados se
+        integran en la transacción exterior.
+        
+        Ejemplo:
+            with db.transaction():
+                for metrics in lote:
+                    db.upsert_asset(metrics)
+        """
+        with self._lock:
+            if self._in_tx:
+                yield
+                return
+            
+            self._ensure_connection()
+            if self.conn.in_transaction:
+                self.conn.commit()  # Cerrar cualquier transacción implícita pendiente
+            self._execute("BEGIN IMMEDIATE")
+            self._in_tx = True
+            self._tx_thread = threading.get_ident()
+            try:
+                yield
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                # Las escrituras del bloque ya subieron _gen; cualquier lectura
+                # cacheada dentro del bloque refleja filas que ya no existen
+                self._gen += 1
+                with self._cache_lock:
+                    self._read_cache.clear()
+                raise
+            finally:
+                self._in_tx = False
+                self._tx_thread = None
     
     def _initialize_database(self):
         """
@@ -86,65 +614,58 @@ class DatabaseManager:
         Este método es privado (prefijo _) porque solo se usa internamente.
         """
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # check_same_thread=False: la instancia se reutiliza entre re-ejecuciones
+            # de Streamlit (hilos distintos); las escrituras se serializan con _lock
+            self.conn = sqlite3.connect(
+                self.db_path,
+                cached_statements=_STATEMENT_CACHE_SIZE,
+                check_same_thread=False
+            )
             self.conn.row_factory = sqlite3.Row  # Permite acceso por nombre de columna
+            self.conn.executescript(_SQL_FAST_MODE_PRAGMAS if self.fast_mode else _SQL_CONNECTION_PRAGMAS)
             
-            # Crear tabla si no existe
+            # Esquema completo en un solo script (tablas e índices)
+            self.conn.executescript(_SQL_SCHEMA)
             cursor = self.conn.cursor()
             
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS assets (
-                    symbol TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    sector TEXT,
-                    industry TEXT,
-                    current_price REAL,
-                    annual_dividend REAL,
-                    dividend_yield REAL,
-                    dividend_frequency TEXT,
-                    dividend_payment_months TEXT,
-                    market_cap INTEGER,
-                    platforms TEXT,
-                    last_updated TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Agregar columnas si no existen (para bases de datos existentes)
-            try:
-                cursor.execute("ALTER TABLE assets ADD COLUMN platforms TEXT")
-            except sqlite3.OperationalError:
-                pass
-            
-            try:
-                cursor.execute("ALTER TABLE assets ADD COLUMN dividend_payment_months TEXT")
-            except sqlite3.OperationalError:
-                pass
+            # Agregar columnas que falten (bases de datos existentes)
+            cursor.execute("PRAGMA table_info(assets)")
+            columns = {row['name'] for row in cursor.fetchall()}
+            for column, col_type in _ASSETS_ADDED_COLUMNS:
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE assets ADD COLUMN {column} {col_type}")
             
-            # Crear tabla de portfolios
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS portfolios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    description TEXT,
-                    selected_symbols TEXT NOT NULL,
-                    shares_data TEXT NOT NULL,
-                    tax_rates_data TEXT NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            # Bitmask de meses de pago: bit i encendido si se paga en el mes i+1.
+            # Columna nueva: migrar los meses guardados como texto
+            if 'dividend_payment_months_mask' not in columns:
+                cursor.execute("""
+                    SELECT symbol, dividend_payment_months FROM assets
+                    WHERE dividend_payment_months IS NOT NULL
+                    AND dividend_payment_months != ''
+                """)
+                cursor.executemany(
+                    "UPDATE assets SET dividend_payment_months_mask = ? WHERE symbol = ?",
+                    [(self._payment_months_to_mask(self._parse_payment_months(row['dividend_payment_months'])),
+                      row['symbol'])
+                     for row in cursor.fetchall()]
                 )
-            """)
             
-            # Crear índices para búsquedas rápidas
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_dividend_frequency 
-                ON assets(dividend_frequency)
-            """)
+            # Bases de datos antiguas: pasar `assets` a WITHOUT ROWID
+            self._migrate_assets_without_rowid(cursor)
             
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_dividend_yield 
-                ON assets(dividend_yield)
-            """)
+            # Migrar plataformas guardadas como texto (solo si la tabla está vacía)
+            cursor.execute("SELECT COUNT(*) AS total FROM asset_platforms")
+            if cursor.fetchone()['total'] == 0:
+                cursor.execute("""
+                    SELECT symbol, platforms FROM assets
+                    WHERE platforms IS NOT NULL AND platforms != ''
+                """)
+                cursor.executemany(
+                    _SQL_INSERT_ASSET_PLATFORM,
+                    [(row['symbol'], p.strip().upper())
+                     for row in cursor.fetchall()
+                     for p in row['platforms'].split(',') if p.strip()]
+                )
             
             self.conn.commit()
             logger.info(f"✅ Base de datos inicializada: {self.db_path}")
@@ -155,6 +676,61 @@ class DatabaseManager:
             print(f"❌ Error inicializando base de datos: {e}")
             raise
     
+    def _migrate_assets_without_rowid(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Migración única: reconstruye `assets` como tabla WITHOUT ROWID.
+        
+        Se copia con la lista explícita de columnas porque en bases antiguas
+        el orden de las columnas difiere (se agregaron con ALTER TABLE).
+        Al borrar la tabla vieja se pierden sus índices, así que se recrean.
+        
+        Args:
+            cursor: Cursor de la conexión recién abierta
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'assets'")
+        row = cursor.fetchone()
+        if row is None or 'WITHOUT ROWID' in row['sql'].upper():
+            return
+        
+        logger.info("Migrando tabla 'assets' a WITHOUT ROWID...")
+        cursor.execute("PRAGMA table_info(assets)")
+        old_columns = {r['name'] for r in cursor.fetchall()}
+        
+        self.conn.commit()  # Cerrar la transacción implícita de pasos anteriores
+        try:
+            cursor.execute("BEGIN")
+            cursor.execute("DROP TABLE IF EXISTS assets_new")
+            cursor.execute(_SQL_CREATE_ASSETS_TABLE.format(table='assets_new'))
+            cursor.execute("PRAGMA table_info(assets_new)")
+            columns = ", ".join(r['name'] for r in cursor.fetchall() if r['name'] in old_columns)
+            cursor.execute(f"""
+                INSERT INTO assets_new ({columns})
+                SELECT {columns} FROM assets WHERE symbol IS NOT NULL
+            """)
+            cursor.execute("DROP TABLE assets")
+            cursor.execute("ALTER TABLE assets_new RENAME TO assets")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        self.conn.executescript(_SQL_CREATE_ASSETS_INDEXES)
+    
+    def _asset_write_params(self, asset_data: Dict) -> Tuple:
+        """
+        Convierte los datos de un activo en la tupla posicional de escritura.
+        
+        El orden es `_ASSET_WRITE_COLUMNS`; las claves faltantes quedan en None.
+        Los meses de pago se guardan como texto y como bitmask.
+        """
+        months_mask = self._payment_months_to_mask(asset_data.get('dividend_payment_months'))
+        return _asset_write_getter({
+            **_ASSET_WRITE_DEFAULTS,
+            **asset_data,
+            'dividend_payment_months': _MASK_TO_CSV[months_mask],
+            'dividend_payment_months_mask': months_mask,
+        })
+    
+    @_serialized
     def upsert_asset(self, asset_data: Dict) -> bool:
         """
         FUNCIÓN CLAVE: Upsert (Insertar o Actualizar).
@@ -177,90 +753,30 @@ class DatabaseManager:
             symbol = asset_data['symbol']
             logger.info(f"Intentando guardar activo: {symbol}")
             
-            self._ensure_connection()
-            cursor = self.conn.cursor()
+            # INSERT ... ON CONFLICT DO UPDATE: una sola sentencia, sin
+            # consultar antes si el activo existe
+            self._execute(_SQL_UPSERT_ASSET, self._asset_write_params(asset_data))
             
-            # Verificar si el activo ya existe
-            cursor.execute("SELECT symbol FROM assets WHERE symbol = ?", (symbol,))
-            exists = cursor.fetchone() is not None
-            logger.debug(f"Activo {symbol} existe: {exists}")
+            # Mantener sincronizada la tabla de plataformas si vienen en los datos
+            if asset_data.get('platforms') is not None:
+                self._replace_asset_platforms(symbol, list(dict.fromkeys(
+                    p.strip().upper() for p in str(asset_data['platforms']).split(',') if p.strip()
+                )))
             
-            if exists:
-                # UPDATE: Actualizar registro existente
-                cursor.execute("""
-                    UPDATE assets 
-                    SET name = ?,
-                        sector = ?,
-                        industry = ?,
-                        current_price = ?,
-                        annual_dividend = ?,
-                        dividend_yield = ?,
-                        dividend_frequency = ?,
-                        dividend_payment_months = ?,
-                        market_cap = ?,
-                        platforms = COALESCE(?, platforms),
-                        last_updated = ?
-                    WHERE symbol = ?
-                """, (
-                    asset_data.get('name'),
-                    asset_data.get('sector'),
-                    asset_data.get('industry'),
-                    asset_data.get('current_price'),
-                    asset_data.get('annual_dividend'),
-                    asset_data.get('dividend_yield'),
-                    asset_data.get('dividend_frequency'),
-                    self._format_payment_months(asset_data.get('dividend_payment_months')),
-                    asset_data.get('market_cap'),
-                    asset_data.get('platforms'),
-                    asset_data.get('last_updated'),
-                    asset_data['symbol']
-                ))
-                operation = "Actualizado"
-            else:
-                # INSERT: Crear nuevo registro
-                cursor.execute("""
-                    INSERT INTO assets 
-                    (symbol, name, sector, industry, current_price, 
-                     annual_dividend, dividend_yield, dividend_frequency, 
-                     dividend_payment_months, market_cap, platforms, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    asset_data.get('symbol'),
-                    asset_data.get('name'),
-                    asset_data.get('sector'),
-                    asset_data.get('industry'),
-                    asset_data.get('current_price'),
-                    asset_data.get('annual_dividend'),
-                    asset_data.get('dividend_yield'),
-                    asset_data.get('dividend_frequency'),
-                    self._format_payment_months(asset_data.get('dividend_payment_months')),
-                    asset_data.get('market_cap'),
-                    asset_data.get('platforms'),
-                    asset_data.get('last_updated')
-                ))
-                operation = "Insertado"
-            
-            self.conn.commit()
+            self._commit()
+            self._gen += 1
             
-            # Verificar que realmente se guardó
-            cursor.execute("SELECT symbol FROM assets WHERE symbol = ?", (symbol,))
-            verified = cursor.fetchone() is not None
-            
-            if verified:
-                logger.info(f"✅ {operation} activo: {symbol} (verificado en BD)")
-                print(f"✅ {operation} activo: {symbol}")
-                return True
-            else:
-                logger.error(f"❌ Error: No se pudo verificar el guardado de {symbol}")
-                print(f"❌ Error: No se pudo verificar el guardado de {symbol}")
-                return False
+            # Si el commit no lanzó excepción, la fila está guardada
+            logger.info(f"✅ Guardado activo: {symbol}")
+            print(f"✅ Guardado activo: {symbol}")
+            return True
             
         except sqlite3.Error as e:
             error_msg = f"❌ Error en upsert para {asset_data.get('symbol', 'N/A')}: {e}"
             logger.error(error_msg, exc_info=True)
             print(error_msg)
             try:
-                self.conn.rollback()
+                self._rollback()
             except:
                 pass
             return False
@@ -269,11 +785,115 @@ class DatabaseManager:
             logger.error(error_msg, exc_info=True)
             print(error_msg)
             try:
-                self.conn.rollback()
+                self._rollback()
             except:
                 pass
             return False
     
+    def upsert_assets_bulk(self, assets: List[Dict]) -> List[str]:
+        """
+        Upsert de un lote de activos en una sola transacción.
+        
+        Usa un único `executemany` con INSERT ... ON CONFLICT DO UPDATE, así
+        que el SQL se prepara una vez y hay un solo commit para todo el lote.
+        Los activos cuyos datos guardados son idénticos (sin contar
+        last_updated) no se reescriben: solo se actualiza su last_updated.
+        
+        Si una fila viola una restricción (IntegrityError) el lote se revierte
+        y se reintenta fila por fila con `upsert_asset`, para que un solo
+        activo inválido no descarte a los demás.
+        
+        Args:
+            assets: Lista de diccionarios con los datos de cada activo
+        
+        Returns:
+            Símbolos guardados, incluyendo los que no cambiaron (vacía si el
+            lote falló completo)
+        """
+        rows = []
+        platform_rows = {}
+        for asset_data in assets:
+            if not asset_data or 'symbol' not in asset_data:
+                logger.error("❌ Datos de activo inválidos: falta 'symbol'")
+                continue
+            rows.append(self._asset_write_params(asset_data))
+            if asset_data.get('platforms') is not None:
+                platform_rows[asset_data['symbol']] = list(dict.fromkeys(
+                    p.strip().upper() for p in str(asset_data['platforms']).split(',') if p.strip()
+                ))
+        
+        if not rows:
+            return []
+        
+        try:
+            with self.transaction():
+                stored = self._stored_write_params([row[0] for row in rows])
+                changed = [row for row in rows if not self._same_as_stored(row, stored.get(row[0]))]
+                if changed:
+                    self.conn.executemany(_SQL_UPSERT_ASSET, changed)
+                    for row in changed:
+                        if row[0] in platform_rows:
+                            self._replace_asset_platforms(row[0], platform_rows[row[0]])
+                skipped = len(rows) - len(changed)
+                if skipped:
+                    changed_symbols = {row[0] for row in changed}
+                    self.conn.executemany(_SQL_TOUCH_ASSET, [
+                        (row[-1], row[0]) for row in rows if row[0] not in changed_symbols
+                    ])
+            self._gen += 1
+            if changed:
+                self._refresh_planner_stats(len(changed))
+            logger.info(f"✅ Lote guardado: {len(changed)} activos ({skipped} sin cambios)")
+            return [row[0] for row in rows]
+            
+        except sqlite3.IntegrityError as e:
+            logger.warning(f"⚠️ Lote rechazado ({e}); guardando {len(rows)} activos uno por uno")
+        except sqlite3.Error as e:
+            logger.error(f"❌ Error en upsert por lote ({len(rows)} activos): {e}", exc_info=True)
+            return []
+        
+        # Solo se llega aquí si el lote violó una restricción
+        return [asset_data['symbol'] for asset_data in assets
+                if asset_data and 'symbol' in asset_data and self.upsert_asset(asset_data)]
+    
+    def _stored_write_params(self, symbols: List[str]) -> Dict[str, Tuple]:
+        """
+        Lee los valores guardados de `_ASSET_COMPARE_COLUMNS` para varios símbolos.
+        
+        Args:
+            symbols: Lista de símbolos
+        
+        Returns:
+            Diccionario {symbol: tupla de valores}; los que no existen no aparecen
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        columns = ", ".join(_ASSET_COMPARE_COLUMNS)
+        stored = {}
+        for start in range(0, len(unique_symbols), _IN_CHUNK_SIZE):
+            chunk = unique_symbols[start:start + _IN_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(f"SELECT {columns} FROM assets WHERE symbol IN ({placeholders})", chunk)
+            for row in cursor.fetchall():
+                stored[row[0]] = row
+        return stored
+    
+    @staticmethod
+    def _same_as_stored(params: Tuple, stored: Optional[Tuple]) -> bool:
+        """
+        Indica si la tupla de escritura no cambiaría la fila guardada.
+        
+        Si platforms viene en None el upsert conserva el valor guardado,
+        así que esa columna no cuenta como cambio.
+        """
+        if stored is None:
+            return False
+        new = params[:len(_ASSET_COMPARE_COLUMNS)]
+        if new[_PLATFORMS_WRITE_INDEX] is None:
+            new = new[:_PLATFORMS_WRITE_INDEX] + (stored[_PLATFORMS_WRITE_INDEX],) + new[_PLATFORMS_WRITE_INDEX + 1:]
+        return new == tuple(stored)
+    
     def get_asset(self, symbol: str) -> Optional[Dict]:
         """
         Obtiene un activo por su símbolo.
@@ -285,26 +905,52 @@ class DatabaseManager:
             Diccionario con los datos o None si no existe
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM assets WHERE symbol = ?", (symbol,))
+            cursor = self._read_execute(_SQL_GET_ASSET, (symbol,))
             row = cursor.fetchone()
             
             if row:
-                # Convertir Row a diccionario
-                asset = dict(row)
-                # Parsear meses de pago
-                if 'dividend_payment_months' in asset:
-                    asset['dividend_payment_months'] = self._parse_payment_months(
-                        asset.get('dividend_payment_months', '')
-                    )
-                return asset
+                return self._row_to_asset(row)
             return None
             
         except sqlite3.Error as e:
             print(f"❌ Error obteniendo activo: {e}")
             return None
     
+    def get_assets_many(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene varios activos en una sola consulta `WHERE symbol IN (...)`.
+        
+        Reemplaza los bucles de `get_asset` por símbolo. Los símbolos se
+        consultan en bloques de `_IN_CHUNK_SIZE` para no superar el límite
+        de parámetros de SQLite.
+        
+        Args:
+            symbols: Lista de símbolos
+        
+        Returns:
+            Diccionario {symbol: activo} en el orden de `symbols` (sin
+            duplicados). Los símbolos que no existen simplemente no aparecen.
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        found = {}
+        try:
+            for start in range(0, len(unique_symbols), _IN_CHUNK_SIZE):
+                chunk = unique_symbols[start:start + _IN_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self._read_execute(f"""
+                    SELECT * FROM assets 
+                    WHERE symbol IN ({placeholders})
+                """, chunk)
+                for row in cursor.fetchall():
+                    asset = self._row_to_asset(row)
+                    found[asset['symbol']] = asset
+            # Cada bloque vuelve en su propio orden: se reordena según la entrada
+            return {symbol: found[symbol] for symbol in unique_symbols if symbol in found}
+            
+        except sqlite3.Error as e:
+            logger.error(f"❌ Error obteniendo activos en lote: {e}")
+            return {}
+    
     def get_all_assets(self, filter_frequency: Optional[str] = None) -> List[Dict]:
         """
         Obtiene todos los activos, opcionalmente filtrados por frecuencia.
@@ -316,37 +962,166 @@ class DatabaseManager:
             Lista de diccionarios con los activos
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            
             if filter_frequency:
-                cursor.execute("""
-                    SELECT * FROM assets 
-                    WHERE dividend_frequency = ?
-                    ORDER BY dividend_yield DESC
-                """, (filter_frequency,))
+                cursor = self._read_execute(_SQL_GET_ASSETS_BY_FREQUENCY, (filter_frequency,))
             else:
-                cursor.execute("""
-                    SELECT * FROM assets 
-                    ORDER BY dividend_yield DESC
-                """)
+                cursor = self._read_execute(_SQL_GET_ALL_ASSETS)
+            
+            return [self._row_to_asset(row) for row in cursor.fetchall()]
+            
+        except sqlite3.Error as e:
+            print(f"❌ Error obteniendo activos: {e}")
+            return []
+    
+    @_cached_until_write
+    def get_all_assets_df(self, filter_frequency: Optional[str] = None,
+                          platform: Optional[str] = None,
+                          payment_month: Optional[int] = None,
+                          min_yield: float = 0.0) -> pd.DataFrame:
+        """
+        Obtiene los activos como DataFrame, filtrando en SQL.
+        
+        Selecciona solo las columnas que usan la UI y los gráficos y arma el
+        DataFrame por columnas: las tuplas de sqlite3 se transponen una vez y
+        cada columna pasa a un array numpy (float32 para precio y yield, que solo
+        se muestran con 2 decimales; float64 para el resto de los números;
+        categoría para la frecuencia), sin un diccionario ni un objeto por celda. Los
+        meses de pago se decodifican desde el bitmask. El resultado queda
+        cacheado hasta la próxima escritura.
+        
+        Args:
+            filter_frequency: Filtrar por 'mensual', 'trimestral', etc.
+            platform: Filtrar por plataforma (ej: 'PREX')
+            payment_month: Filtrar por mes de pago (1-12)
+            min_yield: Yield mínimo (%); 0 no filtra
+        
+        Returns:
+            DataFrame con una fila por activo (vacío si hay error)
+        """
+        from_where, params = self._assets_from_where(filter_frequency, platform, min_yield, payment_month)
+        sql = (f"SELECT {', '.join('a.' + c for c in _ASSET_DF_COLUMNS)}{from_where}"
+               " ORDER BY a.dividend_yield DESC")
+        try:
+            cursor = self._read_execute(sql, params)
+            cursor.row_factory = None  # Tuplas planas: más livianas que sqlite3.Row
             
             rows = cursor.fetchall()
-            assets = [dict(row) for row in rows]
+            # Transponer filas -> columnas una sola vez
+            columns = dict(zip(_ASSET_DF_COLUMNS, zip(*rows))) if rows else dict.fromkeys(_ASSET_DF_COLUMNS, ())
             
-            # Parsear meses de pago para cada activo
-            for asset in assets:
-                if 'dividend_payment_months' in asset:
-                    asset['dividend_payment_months'] = self._parse_payment_months(
-                        asset.get('dividend_payment_months', '')
-                    )
+            data = {}
+            for name, values in columns.items():
+                if name in _ASSET_DF_FLOAT32_COLUMNS:
+                    data[name] = np.array(values, dtype=np.float64).astype(np.float32)  # None -> NaN
+                elif name in _ASSET_DF_FLOAT_COLUMNS:
+                    data[name] = np.array(values, dtype=np.float64)  # None -> NaN
+                elif name == 'dividend_payment_months_mask':
+                    masks = np.nan_to_num(np.array(values, dtype=np.float64)).astype(np.int64) & 0xFFF
+                    data[name] = masks
+                elif name == 'dividend_frequency':
+                    extra = sorted({v for v in values if v is not None} - set(_FREQUENCY_CATEGORIES))
+                    data[name] = pd.Categorical(values, categories=[*_FREQUENCY_CATEGORIES, *extra])
+                else:
+                    data[name] = np.array(values, dtype=object)
             
-            return assets
+            df = pd.DataFrame(data, columns=list(_ASSET_DF_COLUMNS))
+            df['dividend_payment_months'] = df['dividend_payment_months_mask'].map(_MASK_TO_MONTHS)
+            return df
             
         except sqlite3.Error as e:
-            print(f"❌ Error obteniendo activos: {e}")
-            return []
+            logger.error(f"❌ Error obteniendo activos (DataFrame): {e}")
+            return pd.DataFrame(columns=list(_ASSET_DF_COLUMNS) + ['dividend_payment_months'])
     
+    @staticmethod
+    def _assets_from_where(filter_frequency: Optional[str], platform: Optional[str],
+                           min_yield: float, payment_month: Optional[int] = None) -> Tuple[str, List]:
+        """
+        Arma el FROM/WHERE común a las consultas filtradas de activos.
+        
+        Returns:
+            Tupla (sql desde FROM, parámetros)
+        """
+        sql = " FROM assets a"
+        where = []
+        params = []
+        if platform:
+            sql += " JOIN asset_platforms p ON a.symbol = p.symbol"
+            where.append("p.platform = ?")
+            params.append(platform.strip().upper())
+        if filter_frequency:
+            where.append("a.dividend_frequency = ?")
+            params.append(filter_frequency)
+        if min_yield > 0:
+            where.append("a.dividend_yield >= ?")
+            params.append(min_yield)
+        if payment_month:
+            where.append("(a.dividend_payment_months_mask & ?) != 0")
+            params.append(1 << (payment_month - 1))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+    
+    @_cached_until_write
+    def get_all_assets_summary_df(self, filter_frequency: Optional[str] = None,
+                                  platform: Optional[str] = None,
+                                  min_yield: float = 0.0,
+                                  limit: Optional[int] = None,
+                                  offset: int = 0) -> pd.DataFrame:
+        """
+        Obtiene solo las columnas de la tabla de activos, filtrando en SQL.
+        
+        El DataFrame se construye directamente con `cursor.fetchall()` (tuplas
+        planas) y los nombres de `cursor.description`, sin sqlite3.Row ni un
+        diccionario por fila.
+        
+        Args:
+            filter_frequency: Filtrar por 'mensual', 'trimestral', etc.
+            platform: Filtrar por plataforma (ej: 'PREX')
+            min_yield: Yield mínimo (%); 0 no filtra
+            limit: Máximo de filas a devolver (None = todas)
+            offset: Filas a saltear (para paginar junto con `limit`)
+        
+        Returns:
+            DataFrame ordenado por yield descendente (vacío si hay error)
+        """
+        from_where, params = self._assets_from_where(filter_frequency, platform, min_yield)
+        # El símbolo desempata el orden para que las páginas no se solapen
+        sql = (f"SELECT {', '.join('a.' + c for c in _ASSET_SUMMARY_COLUMNS)}{from_where}"
+               " ORDER BY a.dividend_yield DESC, a.symbol")
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        
+        try:
+            cursor = self._read_execute(sql, params)
+            cursor.row_factory = None  # Tuplas planas
+            return pd.DataFrame.from_records(
+                cursor.fetchall(), columns=[d[0] for d in cursor.description]
+            )
+            
+        except sqlite3.Error as e:
+            logger.error(f"❌ Error obteniendo resumen de activos: {e}")
+            return pd.DataFrame(columns=_ASSET_SUMMARY_COLUMNS)
+    
+    @_cached_until_write
+    def count_assets(self, filter_frequency: Optional[str] = None,
+                     platform: Optional[str] = None,
+                     min_yield: float = 0.0) -> int:
+        """
+        Cuenta los activos que cumplen los mismos filtros que
+        `get_all_assets_summary_df` (para calcular la cantidad de páginas).
+        
+        Returns:
+            Cantidad de activos (0 si hay error)
+        """
+        from_where, params = self._assets_from_where(filter_frequency, platform, min_yield)
+        try:
+            return self._read_execute(f"SELECT COUNT(*){from_where}", params).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"❌ Error contando activos: {e}")
+            return 0
+    
+    @_cached_until_write
     def get_all_symbols(self) -> List[str]:
         """
         Obtiene todos los símbolos de activos almacenados en la BD.
@@ -355,15 +1130,14 @@ class DatabaseManager:
             Lista de símbolos (strings)
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT symbol FROM assets ORDER BY symbol")
+            cursor = self._read_execute(_SQL_GET_ALL_SYMBOLS)
             rows = cursor.fetchall()
             return [row['symbol'] for row in rows]
         except sqlite3.Error as e:
             logger.error(f"❌ Error obteniendo símbolos: {e}")
             return []
     
+    @_serialized
     def delete_asset(self, symbol: str) -> bool:
         """
         Elimina un activo de la base de datos.
@@ -375,15 +1149,18 @@ class DatabaseManager:
             True si se eliminó correctamente
         """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM assets WHERE symbol = ?", (symbol,))
-            self.conn.commit()
-            return cursor.rowcount > 0
+            cursor = self._execute("DELETE FROM assets WHERE symbol = ?", (symbol,))
+            deleted = cursor.rowcount > 0
+            self._execute(_SQL_DELETE_ASSET_PLATFORMS, (symbol,))
+            self._commit()
+            self._gen += 1
+            return deleted
             
         except sqlite3.Error as e:
             print(f"❌ Error eliminando activo: {e}")
             return False
     
+    @_cached_until_write
     def get_stats(self) -> Dict:
         """
         Obtiene estadísticas agregadas de la base de datos.
@@ -392,15 +1169,8 @@ class DatabaseManager:
             Diccionario con estadísticas
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            
-            # Total de activos
-            cursor.execute("SELECT COUNT(*) as total FROM assets")
-            total = cursor.fetchone()['total']
-            
-            # Por frecuencia
-            cursor.execute("""
+            # Por frecuencia (recorre solo el índice idx_assets_frequency_yield)
+            cursor = self._read_execute("""
                 SELECT dividend_frequency, COUNT(*) as count
                 FROM assets
                 GROUP BY dividend_frequency
@@ -408,8 +1178,11 @@ class DatabaseManager:
             frequency_dist = {row['dividend_frequency']: row['count'] 
                             for row in cursor.fetchall()}
             
+            # Total de activos: la suma de los grupos, sin otro COUNT(*)
+            total = sum(frequency_dist.values())
+            
             # Promedio de yield
-            cursor.execute("""
+            cursor = self._read_execute("""
                 SELECT AVG(dividend_yield) as avg_yield
                 FROM assets
                 WHERE dividend_yield > 0
@@ -426,6 +1199,7 @@ class DatabaseManager:
             print(f"❌ Error obteniendo estadísticas: {e}")
             return {}
     
+    @_serialized
     def update_platforms(self, symbol: str, platforms: List[str]) -> bool:
         """
         Actualiza las plataformas donde se puede comprar un activo.
@@ -438,21 +1212,21 @@ class DatabaseManager:
             True si se actualizó correctamente
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            
+            # Normalizar una sola vez: mayúsculas y sin duplicados
+            platforms_list = list(dict.fromkeys(p.strip().upper() for p in platforms if p.strip()))
             # Convertir lista a string separado por comas
-            platforms_str = ', '.join([p.strip().upper() for p in platforms if p.strip()])
+            platforms_str = ', '.join(platforms_list)
             
-            cursor.execute("""
-                UPDATE assets 
-                SET platforms = ?
-                WHERE symbol = ?
-            """, (platforms_str, symbol))
+            cursor = self._execute(_SQL_UPDATE_PLATFORMS, (platforms_str, symbol))
+            updated = cursor.rowcount > 0
             
-            self.conn.commit()
+            if updated:
+                self._replace_asset_platforms(symbol, platforms_list)
             
-            if cursor.rowcount > 0:
+            self._commit()
+            self._gen += 1
+            
+            if updated:
                 logger.info(f"✅ Plataformas actualizadas para {symbol}: {platforms_str}")
                 return True
             else:
@@ -474,20 +1248,14 @@ class DatabaseManager:
             Lista de plataformas
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT platforms FROM assets WHERE symbol = ?", (symbol,))
-            row = cursor.fetchone()
-            
-            if row and row['platforms']:
-                # Convertir string separado por comas a lista
-                return [p.strip() for p in row['platforms'].split(',') if p.strip()]
-            return []
+            cursor = self._read_execute(_SQL_GET_PLATFORMS, (symbol,))
+            return [row['platform'] for row in cursor.fetchall()]
             
         except sqlite3.Error as e:
             logger.error(f"❌ Error obteniendo plataformas para {symbol}: {e}")
             return []
     
+    @_cached_until_write
     def get_all_platforms(self) -> List[str]:
         """
         Obtiene todas las plataformas únicas en la base de datos.
@@ -496,23 +1264,29 @@ class DatabaseManager:
             Lista de plataformas únicas
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT platforms FROM assets WHERE platforms IS NOT NULL AND platforms != ''")
-            rows = cursor.fetchall()
-            
-            all_platforms = set()
-            for row in rows:
-                if row['platforms']:
-                    platforms = [p.strip() for p in row['platforms'].split(',') if p.strip()]
-                    all_platforms.update(platforms)
-            
-            return sorted(list(all_platforms))
+            cursor = self._read_execute(_SQL_GET_ALL_PLATFORMS)
+            return [row['platform'] for row in cursor.fetchall()]
             
         except sqlite3.Error as e:
             logger.error(f"❌ Error obteniendo todas las plataformas: {e}")
             return []
     
+    def _replace_asset_platforms(self, symbol: str, platforms: List[str]) -> None:
+        """
+        Reemplaza las filas de `asset_platforms` de un activo.
+        
+        No hace commit: el llamador decide cuándo confirmar la transacción.
+        
+        Args:
+            symbol: Símbolo del activo
+            platforms: Lista de plataformas ya normalizadas (mayúsculas)
+        """
+        self._execute(_SQL_DELETE_ASSET_PLATFORMS, (symbol,))
+        self.conn.executemany(
+            _SQL_INSERT_ASSET_PLATFORM,
+            [(symbol, p) for p in platforms]
+        )
+    
     def _format_payment_months(self, months: List[int]) -> str:
         """
         Formatea una lista de meses a string para almacenar en BD.
@@ -523,11 +1297,10 @@ class DatabaseManager:
         Returns:
             String con meses separados por comas (ej: "1,2,3")
         """
-        if not months:
-            return ""
-        return ",".join([str(m) for m in sorted(months)])
+        return _MASK_TO_CSV[self._payment_months_to_mask(months)]
     
-    def _parse_payment_months(self, months_str: str) -> List[int]:
+    @staticmethod
+    def _parse_payment_months(months_str: str) -> List[int]:
         """
         Parsea un string de meses a lista.
         
@@ -535,26 +1308,71 @@ class DatabaseManager:
             months_str: String con meses separados por comas (ej: "1,2,3" o "1, 2, 3")
         
         Returns:
-            Lista de meses (1-12) válidos
+            Lista de meses (1-12) válidos, ordenada y sin duplicados
         """
-        if not months_str or str(months_str) == 'nan' or str(months_str).strip() == '':
+        if not months_str:
             return []
-        try:
-            # Convertir a string y limpiar
-            months_str = str(months_str).strip()
-            # Dividir por comas y limpiar cada elemento
-            months = []
-            for m in months_str.split(','):
-                m_clean = m.strip()
-                if m_clean.isdigit():
-                    month_num = int(m_clean)
-                    # Validar que sea un mes válido (1-12)
-                    if 1 <= month_num <= 12:
-                        months.append(month_num)
-            return sorted(list(set(months)))  # Eliminar duplicados y ordenar
-        except Exception as e:
-            logger.warning(f"Error parseando meses '{months_str}': {e}")
+        # Copia en lista: la tupla cacheada se comparte entre llamadas
+        return list(_parse_payment_months_str(str(months_str)))
+    
+    @staticmethod
+    def _payment_months_to_mask(months: List[int]) -> int:
+        """
+        Codifica una lista de meses como bitmask entero.
+        
+        El bit i queda encendido si se paga en el mes i+1, de modo que
+        "¿paga en el mes m?" es simplemente `mask & (1 << (m - 1))`.
+        
+        Args:
+            months: Lista de meses (1-12)
+        
+        Returns:
+            Entero de 12 bits (0 si no hay meses)
+        """
+        if not months:
+            return 0
+        mask = 0
+        for m in months:
+            if 1 <= m <= 12:
+                mask |= 1 << (m - 1)
+        return mask
+    
+    def _mask_to_payment_months(self, mask: int) -> List[int]:
+        """
+        Decodifica un bitmask de meses a lista ordenada.
+        
+        Args:
+            mask: Entero de 12 bits (bit i = mes i+1)
+        
+        Returns:
+            Lista de meses (1-12)
+        """
+        if not mask:
             return []
+        return list(_decode_payment_months_mask(mask))
+    
+    def _row_to_asset(self, row: sqlite3.Row) -> Dict:
+        """
+        Convierte una fila de `assets` a diccionario con los meses ya parseados.
+        
+        Usa el bitmask si está disponible y recurre al texto solo para filas
+        antiguas que todavía no lo tienen.
+        
+        Args:
+            row: Fila devuelta por sqlite3
+        
+        Returns:
+            Diccionario con los datos del activo
+        """
+        asset = dict(row)
+        mask = asset.get('dividend_payment_months_mask')
+        if mask is not None:
+            asset['dividend_payment_months'] = self._mask_to_payment_months(mask)
+        elif 'dividend_payment_months' in asset:
+            asset['dividend_payment_months'] = self._parse_payment_months(
+                asset.get('dividend_payment_months', '')
+            )
+        return asset
     
     def get_assets_by_payment_month(self, month: int) -> List[Dict]:
         """
@@ -567,37 +1385,11 @@ class DatabaseManager:
             Lista de activos
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            # Obtener todos los activos que tienen meses de pago definidos
-            # No usamos LIKE porque puede dar falsos positivos (ej: mes 1 coincide con 10, 11, 12)
-            cursor.execute("""
-                SELECT * FROM assets 
-                WHERE dividend_payment_months IS NOT NULL 
-                AND dividend_payment_months != ''
-                ORDER BY dividend_yield DESC
-            """)
+            # AND de enteros sobre el bitmask: sin falsos positivos (mes 1 vs 10, 11, 12)
+            # y sin parsear strings fila por fila
+            cursor = self._read_execute(_SQL_GET_ASSETS_BY_PAYMENT_MONTH, (1 << (month - 1),))
             
-            rows = cursor.fetchall()
-            assets = [dict(row) for row in rows]
-            
-            # Parsear meses y filtrar correctamente
-            # Esto evita falsos positivos al parsear correctamente la lista de meses
-            result = []
-            for asset in assets:
-                months_str = asset.get('dividend_payment_months', '')
-                if not months_str or str(months_str) == 'nan':
-                    continue
-                
-                # Parsear meses correctamente
-                months = self._parse_payment_months(months_str)
-                
-                # Verificar que el mes buscado esté en la lista parseada
-                if month in months:
-                    asset['dividend_payment_months'] = months  # Guardar meses parseados
-                    result.append(asset)
-            
-            return result
+            return [self._row_to_asset(row) for row in cursor.fetchall()]
             
         except sqlite3.Error as e:
             logger.error(f"❌ Error obteniendo activos por mes de pago: {e}")
@@ -617,32 +1409,16 @@ class DatabaseManager:
             Lista de activos
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            # Buscar plataformas que contengan el texto (case insensitive)
-            cursor.execute("""
-                SELECT * FROM assets 
-                WHERE platforms IS NOT NULL 
-                AND UPPER(platforms) LIKE ?
-                ORDER BY dividend_yield DESC
-            """, (f'%{platform.upper()}%',))
-            
-            rows = cursor.fetchall()
-            assets = [dict(row) for row in rows]
+            # Búsqueda exacta por índice (las plataformas se guardan en mayúsculas)
+            cursor = self._read_execute(_SQL_GET_ASSETS_BY_PLATFORM, (platform.strip().upper(),))
             
-            # Parsear meses de pago para cada activo
-            for asset in assets:
-                if 'dividend_payment_months' in asset:
-                    asset['dividend_payment_months'] = self._parse_payment_months(
-                        asset.get('dividend_payment_months', '')
-                    )
-            
-            return assets
+            return [self._row_to_asset(row) for row in cursor.fetchall()]
             
         except sqlite3.Error as e:
             logger.error(f"❌ Error obteniendo activos por plataforma: {e}")
             return []
     
+    @_serialized
     def save_portfolio(self, name: str, description: str, selected_symbols: List[str], 
                       shares_data: Dict[str, int], tax_rates_data: Dict[str, float]) -> bool:
         """
@@ -659,21 +1435,18 @@ class DatabaseManager:
             True si se guardó correctamente, False si hubo error
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            
-            # Convertir datos a JSON strings
-            symbols_str = json.dumps(selected_symbols)
-            shares_str = json.dumps(shares_data)
-            tax_rates_str = json.dumps(tax_rates_data)
+            # Serializar a JSON (bytes, se guardan como BLOB)
+            symbols_str = _json_dumps(selected_symbols)
+            shares_str = _json_dumps(shares_data)
+            tax_rates_str = _json_dumps(tax_rates_data)
             
             # Verificar si ya existe un portfolio con ese nombre
-            cursor.execute("SELECT id FROM portfolios WHERE name = ?", (name,))
+            cursor = self._execute("SELECT id FROM portfolios WHERE name = ?", (name,))
             existing = cursor.fetchone()
             
             if existing:
                 # Actualizar portfolio existente
-                cursor.execute("""
+                self._execute("""
                     UPDATE portfolios 
                     SET description = ?,
                         selected_symbols = ?,
@@ -685,18 +1458,19 @@ class DatabaseManager:
                 logger.info(f"Portfolio '{name}' actualizado")
             else:
                 # Insertar nuevo portfolio
-                cursor.execute("""
+                self._execute("""
                     INSERT INTO portfolios (name, description, selected_symbols, shares_data, tax_rates_data)
                     VALUES (?, ?, ?, ?, ?)
                 """, (name, description, symbols_str, shares_str, tax_rates_str))
                 logger.info(f"Portfolio '{name}' guardado")
             
-            self.conn.commit()
+            self._commit()
+            self._gen += 1
             return True
             
         except sqlite3.Error as e:
             logger.error(f"❌ Error guardando portfolio: {e}")
-            self.conn.rollback()
+            self._rollback()
             return False
         except Exception as e:
             logger.error(f"❌ Error inesperado guardando portfolio: {e}")
@@ -710,9 +1484,7 @@ class DatabaseManager:
             Lista de portfolios
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("""
+            cursor = self._read_execute("""
                 SELECT id, name, description, selected_symbols, shares_data, 
                        tax_rates_data, created_at, updated_at
                 FROM portfolios
@@ -723,12 +1495,7 @@ class DatabaseManager:
             portfolios = []
             
             for row in rows:
-                portfolio = dict(row)
-                # Parsear JSON strings
-                portfolio['selected_symbols'] = json.loads(portfolio['selected_symbols'])
-                portfolio['shares_data'] = json.loads(portfolio['shares_data'])
-                portfolio['tax_rates_data'] = json.loads(portfolio['tax_rates_data'])
-                portfolios.append(portfolio)
+                portfolios.append(self._row_to_portfolio(row))
             
             return portfolios
             
@@ -750,9 +1517,7 @@ class DatabaseManager:
             Diccionario con los datos del portfolio o None si no existe
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("""
+            cursor = self._read_execute("""
                 SELECT id, name, description, selected_symbols, shares_data, 
                        tax_rates_data, created_at, updated_at
                 FROM portfolios
@@ -761,11 +1526,7 @@ class DatabaseManager:
             
             row = cursor.fetchone()
             if row:
-                portfolio = dict(row)
-                portfolio['selected_symbols'] = json.loads(portfolio['selected_symbols'])
-                portfolio['shares_data'] = json.loads(portfolio['shares_data'])
-                portfolio['tax_rates_data'] = json.loads(portfolio['tax_rates_data'])
-                return portfolio
+                return self._row_to_portfolio(row)
             return None
             
         except sqlite3.Error as e:
@@ -775,6 +1536,19 @@ class DatabaseManager:
             logger.error(f"❌ Error inesperado obteniendo portfolio: {e}")
             return None
     
+    def _row_to_portfolio(self, row: sqlite3.Row) -> Dict:
+        """
+        Convierte una fila de `portfolios` a diccionario parseando el JSON.
+        
+        Acepta tanto TEXT (portfolios guardados antes) como BLOB (bytes).
+        """
+        portfolio = dict(row)
+        portfolio['selected_symbols'] = _json_loads(portfolio['selected_symbols'])
+        portfolio['shares_data'] = _json_loads(portfolio['shares_data'])
+        portfolio['tax_rates_data'] = _json_loads(portfolio['tax_rates_data'])
+        return portfolio
+    
+    @_serialized
     def delete_portfolio(self, name: str) -> bool:
         """
         Elimina un portfolio de la base de datos.
@@ -786,10 +1560,9 @@ class DatabaseManager:
             True si se eliminó correctamente, False si hubo error
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM portfolios WHERE name = ?", (name,))
-            self.conn.commit()
+            cursor = self._execute("DELETE FROM portfolios WHERE name = ?", (name,))
+            self._commit()
+            self._gen += 1
             
             if cursor.rowcount > 0:
                 logger.info(f"Portfolio '{name}' eliminado")
@@ -798,7 +1571,7 @@ class DatabaseManager:
             
         except sqlite3.Error as e:
             logger.error(f"❌ Error eliminando portfolio: {e}")
-            self.conn.rollback()
+            self._rollback()
             return False
         except Exception as e:
             logger.error(f"❌ Error inesperado eliminando portfolio: {e}")
@@ -812,15 +1585,12 @@ class DatabaseManager:
             Diccionario con información de depuración
         """
         try:
-            self._ensure_connection()
-            cursor = self.conn.cursor()
-            
             # Contar total de registros
-            cursor.execute("SELECT COUNT(*) as total FROM assets")
+            cursor = self._read_execute("SELECT COUNT(*) as total FROM assets")
             total = cursor.fetchone()['total']
             
             # Obtener algunos ejemplos
-            cursor.execute("SELECT symbol, name, dividend_frequency FROM assets LIMIT 5")
+            cursor = self._read_execute("SELECT symbol, name, dividend_frequency FROM assets LIMIT 5")
             examples = [dict(row) for row in cursor.fetchall()]
             
             return {
@@ -838,10 +1608,44 @@ class DatabaseManager:
                 'examples': []
             }
     
+    def _refresh_planner_stats(self, rows_written: int) -> None:
+        """
+        Ejecuta ANALYZE tras una escritura masiva.
+        
+        Sin estadísticas actualizadas, SQLite puede elegir un recorrido
+        completo de la tabla aunque existan índices útiles. Solo se ejecuta
+        si se escribieron más de `_BULK_ANALYZE_THRESHOLD` filas.
+        
+        Args:
+            rows_written: Cantidad de filas insertadas/actualizadas en el lote
+        """
+        if rows_written <= _BULK_ANALYZE_THRESHOLD:
+            return
+        try:
+            self._execute("ANALYZE assets")
+            self._execute("ANALYZE asset_platforms")
+            self._commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ No se pudo ejecutar ANALYZE: {e}")
+    
     def close(self):
-        """Cierra la conexión a la base de datos."""
+        """
+        Cierra la conexión a la base de datos.
+        
+        Antes de cerrar ejecuta `PRAGMA optimize`, que actualiza las
+        estadísticas del planificador solo para las tablas que lo necesitan.
+        """
         if self.conn:
-            self.conn.close()
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ PRAGMA optimize falló: {e}")
+            finally:
+                self.conn.close()
+                self.conn = None
+                self._close_readers()
+                with self._cache_lock:
+                    self._read_cache.clear()
             print("✅ Conexión cerrada")
 
 
@@ -901,6 +1705,21 @@ if __name__ == "__main__":
     print(f"   Total activos: {stats.get('total_assets', 0)}")
     print(f"   Yield promedio: {stats.get('average_yield', 0)}%")
     
+    # Test Rollback: las lecturas cacheadas dentro del bloque no sobreviven
+    print("\n6. Revirtiendo una transacción...")
+    try:
+        with db.transaction():
+            db.upsert_asset({**test_asset, 'symbol': 'ZZZ_ROLLBACK'})
+            db.get_stats()
+            raise RuntimeError("rollback de prueba")
+    except RuntimeError:
+        pass
+    total_after = db.get_stats().get('total_assets', 0)
+    symbols_after = db.get_all_symbols()
+    assert 'ZZZ_ROLLBACK' not in symbols_after
+    assert total_after == len(symbols_after), (total_after, symbols_after)
+    print(f"   ✅ Caché invalidada tras rollback: {total_after} activos")
+    
     db.close()
     
     print("\n" + "=" * 70)
@@ -28,7 +28,6 @@ para analizar múltiples activos en batch.
 
 import streamlit as st
 import pandas as pd
-from openpyxl import load_workbook
 import io
 from typing import List, Dict
 import sys
@@ -41,6 +40,83 @@ sys.path.append(os.path.dirname(__file__))
 from modulo1_ingenieria_datos import DividendAnalyzer
 from modulo2_persistencia_datos import DatabaseManager
 
+# Constantes de UI: se definen una vez y no en cada re-ejecución de Streamlit
+FREQ_EMOJI = {
+    'mensual': '📅',
+    'trimestral': '📆',
+    'irregular': '⚠️',
+    'sin_dividendos': '❌'
+}
+
+NAV_PAGES = (
+    "🏠 Inicio", "📥 Importar Excel", "🔍 Buscar Activo",
+    "📊 Ver Activos", "📈 Estadísticas"
+)
+
+# Bloques estáticos de la UI: se arman una vez al importar el módulo
+PAGE_CSS = """
+        <style>
+        .main-header {
+            font-size: 2.5rem;
+            font-weight: bold;
+            color: #1f77b4;
+            text-align: center;
+            margin-bottom: 2rem;
+        }
+        .metric-card {
+            background-color: #f0f2f6;
+            padding: 1rem;
+            border-radius: 0.5rem;
+            margin: 0.5rem 0;
+        }
+        </style>
+        """
+
+HEADER_HTML = '<h1 class="main-header">💰 Dividend Hunter Pro</h1>'
+
+WELCOME_MD = """
+        **Bienvenido a Dividend Hunter Pro**
+        
+        Esta aplicación te permite:
+        - 🔍 Buscar activos y analizar sus dividendos
+        - 📊 Importar listas de tickers desde Excel
+        - 📈 Visualizar métricas financieras clave
+        - 💎 Encontrar "gemas" (alto yield, bajo costo)
+        """
+
+# Filas por página en la tabla de activos guardados
+ASSETS_PAGE_SIZE = 100
+
+# Refrescos aproximados de la barra de progreso por proceso
+PROGRESS_UPDATES = 50
+
+
+def _progress_due(i: int, total: int) -> bool:
+    """
+    Indica si en la iteración `i` (base 0) toca refrescar el progreso.
+    
+    Cada refresco es un mensaje al navegador: con lotes grandes se actualiza
+    unas `PROGRESS_UPDATES` veces en lugar de una vez por fila.
+    """
+    return i % max(1, total // PROGRESS_UPDATES) == 0 or i >= total - 1
+
+
+@st.cache_resource
+def get_db() -> DatabaseManager:
+    """
+    Devuelve una única instancia de DatabaseManager.
+    
+    Streamlit re-ejecuta el script en cada interacción; sin caché se
+    abriría una conexión nueva (con la caché de páginas vacía) cada vez.
+    """
+    return DatabaseManager()
+
+
+@st.cache_resource
+def get_analyzer() -> DividendAnalyzer:
+    """Devuelve una única instancia de DividendAnalyzer entre re-ejecuciones."""
+    return DividendAnalyzer()
+
 
 class StreamlitApp:
     """
@@ -53,8 +129,8 @@ class StreamlitApp:
     
     def __init__(self):
         """Inicializa la aplicación."""
-        self.analyzer = DividendAnalyzer()
-        self.db = DatabaseManager()
+        self.analyzer = get_analyzer()
+        self.db = get_db()
         self._setup_page()
     
     def _setup_page(self):
@@ -71,38 +147,13 @@ class StreamlitApp:
         )
         
         # CSS personalizado para mejorar la UI
-        st.markdown("""
-        <style>
-        .main-header {
-            font-size: 2.5rem;
-            font-weight: bold;
-            color: #1f77b4;
-            text-align: center;
-            margin-bottom: 2rem;
-        }
-        .metric-card {
-            background-color: #f0f2f6;
-            padding: 1rem;
-            border-radius: 0.5rem;
-            margin: 0.5rem 0;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(PAGE_CSS, unsafe_allow_html=True)
     
     def render_header(self):
         """Renderiza el encabezado principal."""
-        st.markdown('<h1 class="main-header">💰 Dividend Hunter Pro</h1>', 
-                   unsafe_allow_html=True)
+        st.markdown(HEADER_HTML, unsafe_allow_html=True)
         st.markdown("---")
-        st.markdown("""
-        **Bienvenido a Dividend Hunter Pro**
-        
-        Esta aplicación te permite:
-        - 🔍 Buscar activos y analizar sus dividendos
-        - 📊 Importar listas de tickers desde Excel
-        - 📈 Visualizar métricas financieras clave
-        - 💎 Encontrar "gemas" (alto yield, bajo costo)
-        """)
+        st.markdown(WELCOME_MD)
     
     def render_sidebar(self):
         """
@@ -114,8 +165,7 @@ class StreamlitApp:
         
         page = st.sidebar.radio(
             "Selecciona una opción:",
-            ["🏠 Inicio", "📥 Importar Excel", "🔍 Buscar Activo", 
-             "📊 Ver Activos", "📈 Estadísticas"]
+            NAV_PAGES
         )
         
         st.sidebar.markdown("---")
@@ -131,8 +181,8 @@ class StreamlitApp:
         """
         FUNCIÓN CLAVE: Procesa archivo Excel y extrae tickers.
         
-        Esta función demuestra cómo usar openpyxl para leer Excel
-        y extraer símbolos de tickers para procesamiento batch.
+        Esta función demuestra cómo usar pandas (con openpyxl como motor)
+        para leer Excel y extraer símbolos de tickers para procesamiento batch.
         
         Args:
             uploaded_file: Archivo subido a Streamlit
@@ -142,24 +192,20 @@ class StreamlitApp:
         """
         try:
             # Leer el archivo Excel
-            # Streamlit proporciona el archivo como BytesIO
-            wb = load_workbook(io.BytesIO(uploaded_file.read()))
-            
-            # Obtener la primera hoja
-            ws = wb.active
-            
-            tickers = []
-            
-            # Estrategia: Buscar tickers en la primera columna
+            # Streamlit proporciona el archivo como BytesIO.
+            # Estrategia: los tickers están en la primera columna (usecols=[0])
             # (Puedes adaptar esto según tu formato de Excel)
-            for row in ws.iter_rows(min_row=1, values_only=True):
-                if row[0]:  # Si la primera celda tiene contenido
-                    ticker = str(row[0]).strip().upper()
-                    # Validar que parece un ticker (letras y números, 1-5 caracteres)
-                    if ticker.isalnum() and 1 <= len(ticker) <= 5:
-                        tickers.append(ticker)
+            tickers = pd.read_excel(
+                io.BytesIO(uploaded_file.read()),
+                usecols=[0], header=None, engine='openpyxl', dtype=str
+            )[0]
+            tickers = tickers.dropna().str.strip().str.upper()
             
-            return list(set(tickers))  # Eliminar duplicados
+            # Validar que parece un ticker (letras y números, 1-5 caracteres),
+            # filtrando toda la columna de una vez
+            tickers = tickers[tickers.str.fullmatch(r'[A-Z0-9]{1,5}')]
+            
+            return tickers.drop_duplicates().tolist()  # Eliminar duplicados (conserva el orden)
             
         except Exception as e:
             st.error(f"❌ Error procesando Excel: {e}")
@@ -203,25 +249,27 @@ class StreamlitApp:
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
-                    success_count = 0
                     error_count = 0
+                    assets_to_save = []
                     
-                    for i, ticker in enumerate(tickers):
-                        status_text.text(f"Analizando {ticker}... ({i+1}/{len(tickers)})")
-                        
-                        # Usar la lógica del Módulo 1
-                        metrics = self.analyzer.get_asset_metrics(ticker)
+                    # Usar la lógica del Módulo 1 (descargas en paralelo)
+                    for i, (ticker, metrics) in enumerate(self.analyzer.iter_asset_metrics(tickers)):
+                        update_ui = _progress_due(i, len(tickers))
+                        if update_ui:
+                            status_text.text(f"Analizado {ticker} ({i+1}/{len(tickers)})")
                         
                         if metrics:
-                            # Guardar en BD usando Módulo 2
-                            if self.db.upsert_asset(metrics):
-                                success_count += 1
-                            else:
-                                error_count += 1
+                            assets_to_save.append(metrics)
                         else:
                             error_count += 1
                         
-                        progress_bar.progress((i + 1) / len(tickers))
+                        if update_ui:
+                            progress_bar.progress((i + 1) / len(tickers))
+                    
+                    # Guardar en BD usando Módulo 2: todo el lote en una transacción
+                    status_text.text(f"Guardando {len(assets_to_save)} activos...")
+                    success_count = len(self.db.upsert_assets_bulk(assets_to_save))
+                    error_count += len(assets_to_save) - success_count
                     
                     status_text.empty()
                     progress_bar.empty()
@@ -254,13 +302,7 @@ class StreamlitApp:
                         with col3:
                             st.metric("Dividendo Anual", f"${metrics['annual_dividend']:.2f}")
                         with col4:
-                            freq_emoji = {
-                                'mensual': '📅',
-                                'trimestral': '📆',
-                                'irregular': '⚠️',
-                                'sin_dividendos': '❌'
-                            }
-                            emoji = freq_emoji.get(metrics['dividend_frequency'], '❓')
+                            emoji = FREQ_EMOJI.get(metrics['dividend_frequency'], '❓')
                             st.metric("Frecuencia", 
                                     f"{emoji} {metrics['dividend_frequency'].upper()}")
                         
@@ -289,13 +331,16 @@ class StreamlitApp:
         
         freq_filter = None if filter_freq == "Todos" else filter_freq
         
-        # Obtener activos
-        assets = self.db.get_all_assets(freq_filter)
+        # Obtener solo la página actual, directamente como DataFrame
+        total_count = self.db.count_assets(freq_filter)
+        total_pages = max(1, -(-total_count // ASSETS_PAGE_SIZE))
+        page = 1
+        if total_pages > 1:
+            page = st.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1)
+        offset = (page - 1) * ASSETS_PAGE_SIZE
+        df = self.db.get_all_assets_summary_df(freq_filter, None, 0.0, ASSETS_PAGE_SIZE, offset)
         
-        if assets:
-            # Convertir a DataFrame para mejor visualización
-            df = pd.DataFrame(assets)
-            
+        if not df.empty:
             # Mostrar tabla
             st.dataframe(
                 df[['symbol', 'name', 'current_price', 'dividend_yield', 
@@ -303,7 +348,7 @@ class StreamlitApp:
                 use_container_width=True
             )
             
-            st.info(f"📊 Total: {len(assets)} activos")
+            st.info(f"📊 Mostrando {offset + 1}-{offset + len(df)} de {total_count} activos")
         else:
             st.warning("⚠️ No hay activos guardados. Usa 'Importar Excel' o 'Buscar Activo'")
     
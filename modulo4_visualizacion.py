@@ -37,15 +37,218 @@ Plotly es ideal porque:
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
+import re
+from functools import wraps
 from typing import List, Dict, Optional
+import sqlite3
 import sys
+import threading
 import os
 
 # Importar módulos anteriores
 sys.path.append(os.path.dirname(__file__))
 from modulo2_persistencia_datos import DatabaseManager
 
+# Abreviaturas de los meses para los tooltips
+_MONTH_ABBR = ('Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
+               'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic')
+
+# "Ene, May, Jul, Nov" para cada bitmask de meses de pago (bit i = mes i+1)
+_MONTH_LABELS_BY_MASK = pd.Series([
+    ', '.join(name for i, name in enumerate(_MONTH_ABBR) if mask >> i & 1)
+    for mask in range(4096)
+])
+
+# Frecuencias conocidas y su color (el último es para frecuencias desconocidas)
+_FREQUENCIES = ('mensual', 'trimestral', 'irregular', 'sin_dividendos')
+_FREQUENCY_PALETTE = np.array(['#2ecc71', '#3498db', '#f39c12', '#e74c3c', '#95a5a6'])
+
+# Submuestreo del scatter: por encima de este tamaño muchos puntos caen en el
+# mismo pixel y Plotly se vuelve lento. Se deja un punto por celda de una
+# grilla con la proporción del gráfico (y por frecuencia), dimensionada para
+# que celdas x frecuencias no supere el máximo, más los de mayor yield (las
+# "gemas") para no perderlos nunca.
+_SCATTER_MAX_POINTS = 20000
+_SCATTER_GRID_ASPECT = 1000 / 650  # Ancho/alto del gráfico: celdas en X (precio) por cada una en Y (yield)
+_SCATTER_KEEP_TOP = 500
+
+# Comas (con espacios alrededor y repetidas) entre plataformas
+_PLATFORM_SEPARATORS = re.compile(r'\s*,[\s,]*')
+
+# Color, nombre de leyenda, símbolo y descripción de cada frecuencia en el scatter
+_FREQUENCY_CONFIG = {
+    'mensual': {
+        'color': '#2ecc71',
+        'name': '📅 Pago Mensual (10-12 pagos/año)',
+        'symbol': 'circle',
+        'description': 'Ideal para flujo de caja constante'
+    },
+    'trimestral': {
+        'color': '#3498db',
+        'name': '📆 Pago Trimestral (3-4 pagos/año)',
+        'symbol': 'square',
+        'description': 'Más común en acciones tradicionales'
+    },
+    'irregular': {
+        'color': '#f39c12',
+        'name': '⚠️ Pago Irregular (1-2 pagos/año)',
+        'symbol': 'diamond',
+        'description': 'Pagos esporádicos o especiales'
+    },
+    'sin_dividendos': {
+        'color': '#e74c3c',
+        'name': '❌ Sin Dividendos',
+        'symbol': 'x',
+        'description': 'No paga dividendos actualmente'
+    }
+}
+
+_DEFAULT_FREQUENCY_CONFIG = {'color': '#95a5a6', 'symbol': 'circle', 'description': ''}
+
+# Descripción de cada frecuencia, para los tooltips
+_FREQUENCY_DESCRIPTIONS = {freq: config['description'] for freq, config in _FREQUENCY_CONFIG.items()}
+
+# Layout del scatter "La Búsqueda del Tesoro"
+_SCATTER_LAYOUT = dict(
+    title={
+        'text': '💰 La Búsqueda del Tesoro: Precio vs. Yield',
+        'x': 0.5,
+        'xanchor': 'center',
+        'font': {'size': 22, 'color': '#2c3e50', 'family': 'Arial, sans-serif'}
+    },
+    xaxis_title={
+        'text': 'Precio Actual (USD) ← Más caro',
+        'font': {'size': 14, 'color': '#34495e'}
+    },
+    yaxis_title={
+        'text': 'Dividend Yield (%) ← Mayor retorno',
+        'font': {'size': 14, 'color': '#34495e'}
+    },
+    hovermode='closest',
+    plot_bgcolor='white',
+    paper_bgcolor='#f8f9fa',
+    legend=dict(
+        title=dict(
+            text='<b>Frecuencia de Pago de Dividendos</b>',
+            font=dict(size=13, color='#2c3e50')
+        ),
+        orientation="v",
+        yanchor="top",
+        y=0.98,
+        xanchor="left",
+        x=1.02,
+        bgcolor='rgba(255, 255, 255, 0.8)',
+        bordercolor='#bdc3c7',
+        borderwidth=1,
+        font=dict(size=11),
+        itemclick="toggleothers",
+        itemdoubleclick="toggle"
+    ),
+    height=650,
+    margin=dict(l=80, r=180, t=80, b=80)
+)
+
+# Anotaciones fijas del scatter: zona de gemas, zona a evitar y guía de lectura
+_GEM_ANNOTATION = dict(
+    text="<b>💎 ZONA DE GEMAS</b><br>Bajo precio + Alto yield<br>Ideal para inversión",
+    xref="paper", yref="paper",
+    x=0.02, y=0.98,
+    showarrow=False,
+    bgcolor="rgba(46, 204, 113, 0.25)",
+    bordercolor="rgba(46, 204, 113, 0.8)",
+    borderwidth=2,
+    borderpad=8,
+    font=dict(size=12, color='#1e8449', family='Arial, sans-serif'),
+    align="left"
+)
+
+_AVOID_ANNOTATION = dict(
+    text="<b>⚠️ ZONA A EVITAR</b><br>Alto precio + Bajo yield<br>No eficiente",
+    xref="paper", yref="paper",
+    x=0.98, y=0.02,
+    showarrow=False,
+    bgcolor="rgba(231, 76, 60, 0.25)",
+    bordercolor="rgba(231, 76, 60, 0.8)",
+    borderwidth=2,
+    borderpad=8,
+    font=dict(size=12, color='#c0392b', family='Arial, sans-serif'),
+    align="right"
+)
+
+_GUIDE_ANNOTATION = dict(
+    text="<b>📊 Cómo leer este gráfico:</b><br>" +
+         "• <b>Eje X (Precio):</b> Costo de entrada - Mientras más a la derecha, más caro<br>" +
+         "• <b>Eje Y (Yield):</b> Retorno esperado - Mientras más arriba, mayor retorno<br>" +
+         "• <b>Color/Forma:</b> Frecuencia de pago (ver leyenda a la derecha)<br>" +
+         "• <b>Mejor inversión:</b> Puntos en la esquina superior izquierda",
+    xref="paper", yref="paper",
+    x=0.5, y=-0.12,
+    showarrow=False,
+    bgcolor="rgba(236, 240, 241, 0.9)",
+    bordercolor="#95a5a6",
+    borderwidth=1,
+    borderpad=10,
+    font=dict(size=10, color='#2c3e50', family='Arial, sans-serif'),
+    align="left",
+    xanchor="center"
+)
+
+
+def _months_to_mask(months_data) -> int:
+    """
+    Codifica meses de pago en texto ("1,4,7") o lista/tupla como bitmask.
+    
+    Usa el mismo parseo que la BD; cualquier otro valor (None, NaN) da 0.
+    """
+    if isinstance(months_data, (list, tuple)):
+        months_data = ','.join(map(str, months_data))
+    if not isinstance(months_data, str):
+        return 0
+    return DatabaseManager._payment_months_to_mask(DatabaseManager._parse_payment_months(months_data))
+
+
+# Máximo de figuras memoizadas por ruta de BD
+_FIGURE_CACHE_MAX_ENTRIES = 16
+
+
+def _memoized_figure(method):
+    """
+    Memoiza un gráfico por argumentos hasta que cambien los datos de la BD.
+    
+    Streamlit re-ejecuta la página en cada interacción; con los mismos
+    filtros y la BD sin cambios (`DatabaseManager.data_version()`) se
+    devuelve la misma figura sin volver a armarla. Las figuras vacías
+    (sin trazas) no se guardan. La figura devuelta es compartida: no
+    modificarla en el llamador.
+    """
+    name = method.__name__
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            version = self.db.data_version()
+        except sqlite3.Error:
+            return method(self, *args, **kwargs)
+        
+        cache_key = (name, args, tuple(sorted(kwargs.items())))
+        with self._figure_cache_lock:
+            cached = self._figure_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        fig = method(self, *args, **kwargs)
+        if fig.data:
+            # La caché es compartida por todas las sesiones de la misma BD
+            with self._figure_cache_lock:
+                self._figure_cache.pop(cache_key, None)
+                self._figure_cache[cache_key] = (version, fig)
+                if len(self._figure_cache) > _FIGURE_CACHE_MAX_ENTRIES:
+                    self._figure_cache.pop(next(iter(self._figure_cache)), None)
+        return fig
+    return wrapper
+
 
 class FinancialVisualizer:
     """
@@ -56,19 +259,122 @@ class FinancialVisualizer:
     - No maneja datos ni UI (solo recibe datos y devuelve figuras)
     """
     
+    # Un DatabaseManager (y una caché de figuras) por ruta de BD, compartidos
+    # entre instancias: Streamlit crea un visualizador nuevo en cada re-ejecución
+    _DB_CACHE: Dict[str, DatabaseManager] = {}
+    _FIGURE_CACHES: Dict[str, Dict] = {}
+    _FIGURE_CACHE_LOCKS: Dict[str, threading.Lock] = {}
+    _DB_CACHE_LOCK = threading.Lock()
+    
     def __init__(self, db_path: str = "dividend_hunter.db"):
         """
         Inicializa el visualizador.
         
+        Reutiliza la conexión de instancias anteriores con la misma ruta;
+        DatabaseManager ya es seguro para usar desde varios hilos.
+        
         Args:
             db_path: Ruta a la base de datos (debe ser la misma que usa app.py)
         """
-        self.db = DatabaseManager(db_path)
+        cls = FinancialVisualizer
+        with cls._DB_CACHE_LOCK:
+            if db_path not in cls._DB_CACHE:
+                cls._DB_CACHE[db_path] = DatabaseManager(db_path)
+                cls._FIGURE_CACHES[db_path] = {}
+                cls._FIGURE_CACHE_LOCKS[db_path] = threading.Lock()
+            self.db = cls._DB_CACHE[db_path]
+            self._figure_cache = cls._FIGURE_CACHES[db_path]
+            self._figure_cache_lock = cls._FIGURE_CACHE_LOCKS[db_path]
+    
+    def _load_filtered_df(self, *, platform: Optional[str] = None,
+                          frequency: Optional[str] = None,
+                          payment_month: Optional[int] = None,
+                          min_yield: float = 0.0) -> pd.DataFrame:
+        """
+        Obtiene los activos de los gráficos como DataFrame, ya filtrados.
+        
+        Es el único punto de carga de los gráficos: plataforma, frecuencia,
+        mes de pago (con el bitmask) y yield mínimo se aplican juntos en una
+        sola consulta de SQLite, no en listas de Python. La BD cachea el
+        resultado por combinación de filtros hasta la próxima escritura,
+        así que re-ejecutar la página de Streamlit no vuelve a consultar.
+        
+        Args:
+            platform: Filtrar por plataforma (opcional)
+            frequency: Filtrar por frecuencia (opcional)
+            payment_month: Filtrar por mes de pago 1-12 (opcional)
+            min_yield: Yield mínimo (%); 0 no filtra
+        
+        Returns:
+            DataFrame ordenado por yield descendente (vacío si no hay datos)
+        """
+        return self.db.get_all_assets_df(frequency, platform, payment_month, min_yield)
+    
+    @staticmethod
+    def _downsample_scatter(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reduce un scatter muy grande a un punto por celda de pantalla.
+        
+        Solo actúa por encima de `_SCATTER_MAX_POINTS`. El plano precio/yield
+        se divide en una grilla con proporción `_SCATTER_GRID_ASPECT` y tantas
+        celdas que celdas x frecuencias no pase de `_SCATTER_MAX_POINTS`; se
+        conserva la primera fila de cada (celda, frecuencia), más las
+        `_SCATTER_KEEP_TOP` de mayor yield. El resultado nunca supera
+        `_SCATTER_MAX_POINTS + _SCATTER_KEEP_TOP` filas.
+        
+        Args:
+            df: DataFrame con current_price, dividend_yield y dividend_frequency
+        
+        Returns:
+            El mismo DataFrame o un subconjunto de sus filas (mismo orden)
+        """
+        if len(df) <= _SCATTER_MAX_POINTS:
+            return df
+        
+        x = np.nan_to_num(df['current_price'].to_numpy(dtype=float))
+        y = np.nan_to_num(df['dividend_yield'].to_numpy(dtype=float))
+        # Código 0 = frecuencia faltante (NaN)
+        freq_codes = pd.Categorical(df['dividend_frequency']).codes.astype(np.int64) + 1
+        n_freq = int(freq_codes.max()) + 1
+        cell_budget = max(1, _SCATTER_MAX_POINTS // n_freq)
+        cells_x = max(1, int(np.sqrt(cell_budget * _SCATTER_GRID_ASPECT)))
+        cells_y = max(1, cell_budget // cells_x)
+        bin_w = (x.max() - x.min()) / cells_x or 1.0
+        bin_h = (y.max() - y.min()) / cells_y or 1.0
+        ix = np.minimum(((x - x.min()) // bin_w).astype(np.int64), cells_x - 1)
+        iy = np.minimum(((y - y.min()) // bin_h).astype(np.int64), cells_y - 1)
+        
+        keys = (ix * cells_y + iy) * n_freq + freq_codes
+        _, first_in_cell = np.unique(keys, return_index=True)
+        top_yield = np.argpartition(-y, _SCATTER_KEEP_TOP - 1)[:_SCATTER_KEEP_TOP]
+        return df.iloc[np.union1d(first_in_cell, top_yield)]
+    
+    @staticmethod
+    def _empty_figure(message: str) -> go.Figure:
+        """
+        Crea una figura vacía con un mensaje centrado.
+        
+        Args:
+            message: Texto a mostrar
+        
+        Returns:
+            Figura de Plotly
+        """
+        fig = go.Figure()
+        fig.add_annotation(
+            text=message,
+            xref="paper", yref="paper",
+            x=0.5, y=0.5, showarrow=False
+        )
+        return fig
     
     def _asset_has_platform(self, asset: Dict, platform: str) -> bool:
         """
         Verifica si un activo tiene una plataforma específica.
         
+        Se mantiene por compatibilidad: delega en `platforms_mask` con una sola
+        fila. Para muchos activos usar `platforms_mask` sobre un DataFrame.
+        
         Args:
             asset: Diccionario con datos del activo
             platform: Nombre de la plataforma
@@ -76,16 +382,15 @@ class FinancialVisualizer:
         Returns:
             True si el activo tiene la plataforma
         """
-        platforms = asset.get('platforms', '')
-        if not platforms or str(platforms) == 'nan':
-            return False
-        platforms_list = [p.strip().upper() for p in str(platforms).split(',') if p.strip()]
-        return platform.upper() in platforms_list
+        row = pd.DataFrame({'platforms': [asset.get('platforms')]})
+        return bool(self.platforms_mask(row, platform)[0])
     
     def _asset_has_payment_month(self, asset: Dict, month: int) -> bool:
         """
         Verifica si un activo paga dividendos en un mes específico.
         
+        Para muchos activos usar `payment_month_mask` sobre un DataFrame.
+        
         Args:
             asset: Diccionario con datos del activo
             month: Mes (1-12)
@@ -93,91 +398,86 @@ class FinancialVisualizer:
         Returns:
             True si el activo paga en ese mes
         """
-        months_data = asset.get('dividend_payment_months', '')
-        if not months_data or str(months_data) == 'nan' or str(months_data).strip() == '':
-            return False
+        mask = asset.get('dividend_payment_months_mask')
+        if mask is None:
+            mask = _months_to_mask(asset.get('dividend_payment_months'))
+        return bool(int(mask) >> (month - 1) & 1)
+    
+    @staticmethod
+    def platforms_mask(df: pd.DataFrame, platform: str) -> np.ndarray:
+        """
+        Máscara booleana de los activos del DataFrame que están en `platform`.
         
-        # Si ya es una lista parseada, verificar directamente
-        if isinstance(months_data, list):
-            return month in months_data
+        Una sola búsqueda regex vectorizada sobre la columna `platforms`
+        (lista separada por comas, sin distinguir mayúsculas). Los valores
+        vacíos o NaN no coinciden.
         
-        # Si es string, parsear correctamente usando el método de la BD
-        # Usar el mismo método de parseo que la BD para consistencia
-        months_str = str(months_data).strip()
-        try:
-            months = []
-            for m in months_str.split(','):
-                m_clean = m.strip()
-                if m_clean.isdigit():
-                    month_num = int(m_clean)
-                    # Validar que sea un mes válido (1-12)
-                    if 1 <= month_num <= 12:
-                        months.append(month_num)
-            return month in months
-        except Exception:
-            return False
+        Args:
+            df: DataFrame de activos
+            platform: Nombre de la plataforma
+        
+        Returns:
+            Array booleano alineado con las filas de `df`
+        """
+        pattern = rf'(?:^|,)\s*{re.escape(platform.strip())}\s*(?:,|$)'
+        platforms = df['platforms'].astype('string').fillna('')
+        return platforms.str.contains(pattern, case=False, regex=True).to_numpy(dtype=bool)
     
-    def _format_tooltip_text(self, row: pd.Series, config: Dict) -> str:
+    @staticmethod
+    def payment_month_mask(df: pd.DataFrame, month: int) -> np.ndarray:
         """
-        Formatea el texto del tooltip incluyendo información de plataformas.
+        Máscara booleana de los activos del DataFrame que pagan en `month`.
+        
+        Con la columna `dividend_payment_months_mask` (bit i = mes i+1) es un
+        único AND bit a bit de numpy sobre toda la columna. Si solo viene
+        `dividend_payment_months` (texto o listas), se codifica primero.
         
         Args:
-            row: Fila del DataFrame con datos del activo
-            config: Configuración de frecuencia
+            df: DataFrame de activos
+            month: Mes (1-12)
         
         Returns:
-            Texto formateado para el tooltip
+            Array booleano alineado con las filas de `df`
         """
-        text = f"<b>{row['symbol']}</b><br>{row['name']}<br>"
-        text += f"Precio: ${row['current_price']:.2f}<br>"
-        text += f"Yield: {row['dividend_yield']:.2f}%<br>"
-        text += f"Frecuencia: {config['description']}"
-        
-        # Agregar plataformas si existen
-        if 'platforms' in row and row['platforms'] and str(row['platforms']) != 'nan':
-            platforms = [p.strip() for p in str(row['platforms']).split(',') if p.strip()]
-            if platforms:
-                text += f"<br>🏪 Plataformas: {', '.join(platforms)}"
-        
-        # Agregar meses de pago si existen
-        if 'dividend_payment_months' in row and row['dividend_payment_months'] and str(row['dividend_payment_months']) != 'nan':
-            months_data = row['dividend_payment_months']
-            months = []
-            
-            # Parsear meses correctamente según el tipo de dato
-            if isinstance(months_data, list):
-                # Si ya es una lista, usar directamente (validar que sean enteros)
-                months = [m for m in months_data if isinstance(m, int) and 1 <= m <= 12]
-            elif isinstance(months_data, str):
-                # Si es string, parsear usando el mismo método que la BD
-                months_str = str(months_data).strip()
-                if months_str:
-                    for m in months_str.split(','):
-                        m_clean = m.strip()
-                        if m_clean.isdigit():
-                            month_num = int(m_clean)
-                            if 1 <= month_num <= 12:
-                                months.append(month_num)
-            else:
-                # Intentar convertir a string y parsear
-                months_str = str(months_data).strip()
-                if months_str:
-                    for m in months_str.split(','):
-                        m_clean = m.strip()
-                        if m_clean.isdigit():
-                            month_num = int(m_clean)
-                            if 1 <= month_num <= 12:
-                                months.append(month_num)
-            
-            # Mostrar meses en el tooltip
-            if months:
-                month_names = {1: 'Ene', 2: 'Feb', 3: 'Mar', 4: 'Abr', 5: 'May', 6: 'Jun',
-                             7: 'Jul', 8: 'Ago', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'}
-                month_labels = [month_names.get(m, str(m)) for m in sorted(months)]
-                text += f"<br>📅 Paga en: {', '.join(month_labels)}"
+        if 'dividend_payment_months_mask' in df.columns:
+            masks = df['dividend_payment_months_mask'].fillna(0).to_numpy(dtype=np.int64)
+        else:
+            masks = df['dividend_payment_months'].map(_months_to_mask).to_numpy(dtype=np.int64)
+        return (masks & (1 << (month - 1))) != 0
+    
+    def _format_tooltip_texts(self, df: pd.DataFrame, descriptions: Dict[str, str]) -> pd.Series:
+        """
+        Arma el texto del tooltip de todos los activos de una vez.
+        
+        Las columnas se concatenan como Series (sin iterar filas). Los meses
+        de pago salen del bitmask con una tabla precalculada por máscara.
         
+        Args:
+            df: DataFrame con los activos a graficar
+            descriptions: Descripción de cada frecuencia para el tooltip
+        
+        Returns:
+            Series de textos alineada con el índice de `df`
+        """
+        text = ("<b>" + df['symbol'] + "</b><br>" + df['name'].fillna(df['symbol']) + "<br>"
+                + "Precio: $" + pd.Series(np.char.mod('%.2f', df['current_price'].to_numpy(dtype=float)), index=df.index)
+                + "<br>Yield: " + pd.Series(np.char.mod('%.2f', df['dividend_yield'].to_numpy(dtype=float)), index=df.index)
+                + "%<br>Frecuencia: " + df['dividend_frequency'].astype(object).map(descriptions).fillna(''))
+        
+        # Plataformas: "A ,B,, C" -> "A, B, C"
+        platforms = (df['platforms'].astype('string')
+                     .str.replace(_PLATFORM_SEPARATORS, ', ', regex=True)
+                     .str.strip(', '))
+        has_platforms = platforms.fillna('').ne('')
+        text = text.where(~has_platforms, text + "<br>🏪 Plataformas: " + platforms)
+        
+        # Meses de pago: etiqueta precalculada para cada una de las 4096 máscaras
+        month_labels = df['dividend_payment_months_mask'].fillna(0).astype('int64').map(_MONTH_LABELS_BY_MASK)
+        has_months = month_labels.ne('')
+        text = text.where(~has_months, text + "<br>📅 Paga en: " + month_labels)
         return text
     
+    @_memoized_figure
     def create_treasure_hunt_scatter(self, 
                                     filter_frequency: Optional[str] = None,
                                     min_yield: float = 0.0,
@@ -196,128 +496,33 @@ class FinancialVisualizer:
         Returns:
             Figura de Plotly lista para mostrar
         """
-        # Obtener datos con estrategia de filtrado combinado
-        # IMPORTANTE: Aplicar todos los filtros en el orden correcto para evitar resultados incorrectos
+        # Todos los filtros (incluido el yield mínimo) en una sola consulta
+        df = self._load_filtered_df(platform=filter_platform, frequency=filter_frequency,
+                                    payment_month=filter_payment_month, min_yield=min_yield)
         
-        # Paso 1: Obtener conjunto base de activos
-        if filter_platform:
-            assets = self.db.get_assets_by_platform(filter_platform)
-        else:
-            assets = self.db.get_all_assets()
-        
-        # Paso 2: Aplicar filtro de frecuencia (si existe)
-        if filter_frequency:
-            assets = [a for a in assets if a.get('dividend_frequency') == filter_frequency]
-        
-        # Paso 3: Aplicar filtro de mes de pago (si existe) - DEBE ser el último para asegurar precisión
-        if filter_payment_month:
-            # Filtrar activos que realmente pagan en el mes seleccionado
-            # VALIDACIÓN CRÍTICA: Solo incluir activos cuyo mes de pago esté en la lista de meses que paga
-            filtered_assets = []
-            for asset in assets:
-                months_data = asset.get('dividend_payment_months', '')
-                
-                # Si no hay datos de meses, excluir el activo
-                if not months_data or str(months_data) == 'nan' or str(months_data).strip() == '':
-                    continue
-                
-                # Parsear meses - Asegurar que siempre sea una lista de enteros
-                months = []
-                if isinstance(months_data, str):
-                    # Si es string, parsear usando el método de la BD
-                    months = self.db._parse_payment_months(months_data)
-                elif isinstance(months_data, list):
-                    # Si ya es lista, validar y normalizar
-                    months = []
-                    for m in months_data:
-                        if isinstance(m, int) and 1 <= m <= 12:
-                            months.append(m)
-                        elif isinstance(m, str) and m.strip().isdigit():
-                            m_int = int(m.strip())
-                            if 1 <= m_int <= 12:
-                                months.append(m_int)
-                else:
-                    # Tipo no reconocido, intentar convertir a string y parsear
-                    months = self.db._parse_payment_months(str(months_data))
-                
-                # Actualizar el asset con los meses parseados
-                asset['dividend_payment_months'] = months
-                
-                # VALIDACIÓN CRÍTICA: Verificar que el mes filtrado esté en la lista de meses que paga
-                # Solo incluir si el mes está presente en la lista
-                if months and filter_payment_month in months:
-                    filtered_assets.append(asset)
-            
-            assets = filtered_assets
-        
-        if not assets:
-            # Crear figura vacía con mensaje
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos para visualizar",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
+        if df.empty:
+            has_filters = filter_platform or filter_frequency or filter_payment_month or min_yield > 0
+            return self._empty_figure(
+                "No hay activos que cumplan los filtros" if has_filters else "No hay datos para visualizar"
             )
-            return fig
         
-        # Convertir a DataFrame
-        df = pd.DataFrame(assets)
+        # Con decenas de miles de puntos, dejar uno por celda de pantalla
+        df = self._downsample_scatter(df)
         
-        # Filtrar por yield mínimo
-        df = df[df['dividend_yield'] >= min_yield]
-        
-        if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay activos que cumplan los filtros",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
-        
-        # Mapeo de frecuencia a colores y símbolos con descripciones claras
-        frequency_config = {
-            'mensual': {
-                'color': '#2ecc71', 
-                'name': '📅 Pago Mensual (10-12 pagos/año)', 
-                'symbol': 'circle',
-                'description': 'Ideal para flujo de caja constante'
-            },
-            'trimestral': {
-                'color': '#3498db', 
-                'name': '📆 Pago Trimestral (3-4 pagos/año)', 
-                'symbol': 'square',
-                'description': 'Más común en acciones tradicionales'
-            },
-            'irregular': {
-                'color': '#f39c12', 
-                'name': '⚠️ Pago Irregular (1-2 pagos/año)', 
-                'symbol': 'diamond',
-                'description': 'Pagos esporádicos o especiales'
-            },
-            'sin_dividendos': {
-                'color': '#e74c3c', 
-                'name': '❌ Sin Dividendos', 
-                'symbol': 'x',
-                'description': 'No paga dividendos actualmente'
-            }
-        }
+        # Tooltips de todos los puntos en una sola pasada
+        df = df.assign(tooltip=self._format_tooltip_texts(df, _FREQUENCY_DESCRIPTIONS))
         
         # Crear figura
         fig = go.Figure()
         
-        # Agrupar por frecuencia y crear trazos separados
-        for freq in df['dividend_frequency'].unique():
-            freq_data = df[df['dividend_frequency'] == freq]
-            config = frequency_config.get(freq, {
-                'color': '#95a5a6',
-                'name': freq.capitalize(),
-                'symbol': 'circle'
-            })
+        # Agrupar por frecuencia y crear trazos separados (groupby particiona en una pasada)
+        for freq, freq_data in df.groupby('dividend_frequency', sort=False, observed=True):
+            config = _FREQUENCY_CONFIG.get(freq, {**_DEFAULT_FREQUENCY_CONFIG, 'name': freq.capitalize()})
             
-            fig.add_trace(go.Scatter(
-                x=freq_data['current_price'],
-                y=freq_data['dividend_yield'],
+            # Scattergl dibuja con WebGL: sigue fluido con miles de puntos (SVG no)
+            fig.add_trace(go.Scattergl(
+                x=freq_data['current_price'].to_numpy(),
+                y=freq_data['dividend_yield'].to_numpy(),
                 mode='markers',
                 name=config['name'],
                 marker=dict(
@@ -327,100 +532,26 @@ class FinancialVisualizer:
                     line=dict(width=2, color='white'),
                     opacity=0.85
                 ),
-                text=[self._format_tooltip_text(row, config) for _, row in freq_data.iterrows()],
+                text=freq_data['tooltip'].to_numpy(),
                 hovertemplate='%{text}<extra></extra>',
-                customdata=freq_data['symbol'].values,
+                customdata=freq_data['symbol'].to_numpy(),
                 legendgroup=config['name']
             ))
         
         # Personalizar layout
-        fig.update_layout(
-            title={
-                'text': '💰 La Búsqueda del Tesoro: Precio vs. Yield',
-                'x': 0.5,
-                'xanchor': 'center',
-                'font': {'size': 22, 'color': '#2c3e50', 'family': 'Arial, sans-serif'}
-            },
-            xaxis_title={
-                'text': 'Precio Actual (USD) ← Más caro',
-                'font': {'size': 14, 'color': '#34495e'}
-            },
-            yaxis_title={
-                'text': 'Dividend Yield (%) ← Mayor retorno',
-                'font': {'size': 14, 'color': '#34495e'}
-            },
-            hovermode='closest',
-            plot_bgcolor='white',
-            paper_bgcolor='#f8f9fa',
-            legend=dict(
-                title=dict(
-                    text='<b>Frecuencia de Pago de Dividendos</b>',
-                    font=dict(size=13, color='#2c3e50')
-                ),
-                orientation="v",
-                yanchor="top",
-                y=0.98,
-                xanchor="left",
-                x=1.02,
-                bgcolor='rgba(255, 255, 255, 0.8)',
-                bordercolor='#bdc3c7',
-                borderwidth=1,
-                font=dict(size=11),
-                itemclick="toggleothers",
-                itemdoubleclick="toggle"
-            ),
-            height=650,
-            margin=dict(l=80, r=180, t=80, b=80)
-        )
+        fig.update_layout(**_SCATTER_LAYOUT)
         
         # Agregar anotaciones explicativas mejoradas
-        fig.add_annotation(
-            text="<b>💎 ZONA DE GEMAS</b><br>Bajo precio + Alto yield<br>Ideal para inversión",
-            xref="paper", yref="paper",
-            x=0.02, y=0.98,
-            showarrow=False,
-            bgcolor="rgba(46, 204, 113, 0.25)",
-            bordercolor="rgba(46, 204, 113, 0.8)",
-            borderwidth=2,
-            borderpad=8,
-            font=dict(size=12, color='#1e8449', family='Arial, sans-serif'),
-            align="left"
-        )
+        fig.add_annotation(**_GEM_ANNOTATION)
         
-        fig.add_annotation(
-            text="<b>⚠️ ZONA A EVITAR</b><br>Alto precio + Bajo yield<br>No eficiente",
-            xref="paper", yref="paper",
-            x=0.98, y=0.02,
-            showarrow=False,
-            bgcolor="rgba(231, 76, 60, 0.25)",
-            bordercolor="rgba(231, 76, 60, 0.8)",
-            borderwidth=2,
-            borderpad=8,
-            font=dict(size=12, color='#c0392b', family='Arial, sans-serif'),
-            align="right"
-        )
+        fig.add_annotation(**_AVOID_ANNOTATION)
         
         # Agregar guía de interpretación en la parte inferior
-        fig.add_annotation(
-            text="<b>📊 Cómo leer este gráfico:</b><br>" +
-                 "• <b>Eje X (Precio):</b> Costo de entrada - Mientras más a la derecha, más caro<br>" +
-                 "• <b>Eje Y (Yield):</b> Retorno esperado - Mientras más arriba, mayor retorno<br>" +
-                 "• <b>Color/Forma:</b> Frecuencia de pago (ver leyenda a la derecha)<br>" +
-                 "• <b>Mejor inversión:</b> Puntos en la esquina superior izquierda",
-            xref="paper", yref="paper",
-            x=0.5, y=-0.12,
-            showarrow=False,
-            bgcolor="rgba(236, 240, 241, 0.9)",
-            bordercolor="#95a5a6",
-            borderwidth=1,
-            borderpad=10,
-            font=dict(size=10, color='#2c3e50', family='Arial, sans-serif'),
-            align="left",
-            xanchor="center"
-        )
+        fig.add_annotation(**_GUIDE_ANNOTATION)
         
         return fig
     
+    @_memoized_figure
     def create_yield_distribution(self, 
                                  filter_frequency: Optional[str] = None,
                                  filter_platform: Optional[str] = None,
@@ -437,71 +568,17 @@ class FinancialVisualizer:
         Returns:
             Figura de Plotly
         """
-        # Obtener datos con estrategia de filtrado combinado
-        # Paso 1: Obtener conjunto base de activos
-        if filter_platform:
-            assets = self.db.get_assets_by_platform(filter_platform)
-        else:
-            assets = self.db.get_all_assets()
-        
-        # Paso 2: Aplicar filtro de frecuencia (si existe)
-        if filter_frequency:
-            assets = [a for a in assets if a.get('dividend_frequency') == filter_frequency]
-        
-        # Paso 3: Aplicar filtro de mes de pago (si existe) - DEBE ser el último para asegurar precisión
-        if filter_payment_month:
-            # VALIDACIÓN CRÍTICA: Solo incluir activos cuyo mes de pago esté en la lista de meses que paga
-            filtered_assets = []
-            for asset in assets:
-                months_data = asset.get('dividend_payment_months', '')
-                
-                # Si no hay datos de meses, excluir el activo
-                if not months_data or str(months_data) == 'nan' or str(months_data).strip() == '':
-                    continue
-                
-                # Parsear meses - Asegurar que siempre sea una lista de enteros
-                months = []
-                if isinstance(months_data, str):
-                    months = self.db._parse_payment_months(months_data)
-                elif isinstance(months_data, list):
-                    for m in months_data:
-                        if isinstance(m, int) and 1 <= m <= 12:
-                            months.append(m)
-                        elif isinstance(m, str) and m.strip().isdigit():
-                            m_int = int(m.strip())
-                            if 1 <= m_int <= 12:
-                                months.append(m_int)
-                else:
-                    months = self.db._parse_payment_months(str(months_data))
-                
-                asset['dividend_payment_months'] = months
-                
-                # VALIDACIÓN: Verificar que el mes filtrado esté en la lista de meses que paga
-                if months and filter_payment_month in months:
-                    filtered_assets.append(asset)
-            
-            assets = filtered_assets
-        
-        if not assets:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos para visualizar",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+        # Plataforma, frecuencia y mes de pago se filtran en la consulta
+        df = self._load_filtered_df(platform=filter_platform, frequency=filter_frequency,
+                                    payment_month=filter_payment_month)
+        
+        if df.empty:
+            return self._empty_figure("No hay datos para visualizar")
         
-        df = pd.DataFrame(assets)
         df = df[df['dividend_yield'] > 0]  # Solo activos con dividendos
         
         if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay activos con dividendos",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+            return self._empty_figure("No hay activos con dividendos")
         
         fig = px.histogram(
             df,
@@ -520,6 +597,7 @@ class FinancialVisualizer:
         
         return fig
     
+    @_memoized_figure
     def create_top_performers(self, top_n: int = 10) -> go.Figure:
         """
         Crea un gráfico de barras con los top N activos por yield.
@@ -530,45 +608,34 @@ class FinancialVisualizer:
         Returns:
             Figura de Plotly
         """
-        assets = self.db.get_all_assets()
-        
-        if not assets:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos para visualizar",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
-        
-        df = pd.DataFrame(assets)
-        df = df[df['dividend_yield'] > 0].nlargest(top_n, 'dividend_yield')
+        df = self._load_filtered_df()
         
         if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay activos con dividendos",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+            return self._empty_figure("No hay datos para visualizar")
+        
+        df = df[df['dividend_yield'] > 0]
+        
+        if df.empty or top_n <= 0:
+            return self._empty_figure("No hay activos con dividendos")
         
-        # Mapear frecuencia a colores
-        frequency_colors = {
-            'mensual': '#2ecc71',
-            'trimestral': '#3498db',
-            'irregular': '#f39c12',
-            'sin_dividendos': '#e74c3c'
-        }
+        # Top N en O(n) con argpartition; solo esos N se ordenan
+        yields = df['dividend_yield'].to_numpy()
+        if top_n < len(yields):
+            top_idx = np.argpartition(-yields, top_n - 1)[:top_n]
+        else:
+            top_idx = np.arange(len(yields))
+        df = df.iloc[top_idx[np.argsort(-yields[top_idx], kind='stable')]]
         
-        df['color'] = df['dividend_frequency'].map(frequency_colors).fillna('#95a5a6')
+        # Color por frecuencia: código de categoría -> paleta (-1 = desconocida, gris)
+        codes = pd.Categorical(df['dividend_frequency'], categories=_FREQUENCIES).codes
+        colors = _FREQUENCY_PALETTE[codes]
         
         fig = go.Figure()
         
         fig.add_trace(go.Bar(
             x=df['symbol'],
             y=df['dividend_yield'],
-            marker_color=df['color'],
+            marker_color=colors,
             text=[f"{y:.2f}%" for y in df['dividend_yield']],
             textposition='outside',
             hovertemplate='<b>%{x}</b><br>Yield: %{y:.2f}%<extra></extra>'
@@ -585,6 +652,7 @@ class FinancialVisualizer:
         
         return fig
     
+    @_memoized_figure
     def create_frequency_comparison(self, 
                                    filter_platform: Optional[str] = None,
                                    filter_payment_month: Optional[int] = None) -> go.Figure:
@@ -597,66 +665,23 @@ class FinancialVisualizer:
         Returns:
             Figura de Plotly
         """
-        # Obtener datos con estrategia de filtrado combinado
-        # Paso 1: Obtener conjunto base de activos
-        if filter_platform:
-            assets = self.db.get_assets_by_platform(filter_platform)
-        else:
-            assets = self.db.get_all_assets()
-        
-        # Paso 2: Aplicar filtro de mes de pago (si existe) - DEBE ser el último para asegurar precisión
-        if filter_payment_month:
-            # VALIDACIÓN CRÍTICA: Solo incluir activos cuyo mes de pago esté en la lista de meses que paga
-            filtered_assets = []
-            for asset in assets:
-                months_data = asset.get('dividend_payment_months', '')
-                
-                # Si no hay datos de meses, excluir el activo
-                if not months_data or str(months_data) == 'nan' or str(months_data).strip() == '':
-                    continue
-                
-                # Parsear meses - Asegurar que siempre sea una lista de enteros
-                months = []
-                if isinstance(months_data, str):
-                    months = self.db._parse_payment_months(months_data)
-                elif isinstance(months_data, list):
-                    for m in months_data:
-                        if isinstance(m, int) and 1 <= m <= 12:
-                            months.append(m)
-                        elif isinstance(m, str) and m.strip().isdigit():
-                            m_int = int(m.strip())
-                            if 1 <= m_int <= 12:
-                                months.append(m_int)
-                else:
-                    months = self.db._parse_payment_months(str(months_data))
-                
-                asset['dividend_payment_months'] = months
-                
-                # VALIDACIÓN: Verificar que el mes filtrado esté en la lista de meses que paga
-                if months and filter_payment_month in months:
-                    filtered_assets.append(asset)
-            
-            assets = filtered_assets
-        
-        if not assets:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos para visualizar",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+        # Plataforma y mes de pago se filtran en la consulta
+        df = self._load_filtered_df(platform=filter_platform, payment_month=filter_payment_month)
         
-        df = pd.DataFrame(assets)
+        if df.empty:
+            return self._empty_figure("No hay datos para visualizar")
         
-        # Agrupar por frecuencia y calcular promedios
-        summary = df.groupby('dividend_frequency').agg({
+        # Agrupar por frecuencia (categórica: agrupa por códigos, sin hashear textos)
+        summary = df.groupby('dividend_frequency', observed=True).agg({
             'dividend_yield': 'mean',
             'current_price': 'mean',
             'symbol': 'count'
         }).reset_index()
         
         summary.columns = ['frequency', 'avg_yield', 'avg_price', 'count']
+        frequencies = summary['frequency'].to_numpy(dtype=object)
+        avg_yield = summary['avg_yield'].to_numpy(dtype=float)
+        avg_price = summary['avg_price'].to_numpy(dtype=float)
         
         # Crear subplots
         fig = make_subplots(
@@ -668,11 +693,11 @@ class FinancialVisualizer:
         # Yield promedio
         fig.add_trace(
             go.Bar(
-                x=summary['frequency'],
-                y=summary['avg_yield'],
+                x=frequencies,
+                y=avg_yield,
                 name='Yield Promedio',
                 marker_color='#3498db',
-                text=[f"{y:.2f}%" for y in summary['avg_yield']],
+                text=np.char.mod('%.2f%%', avg_yield),
                 textposition='outside'
             ),
             row=1, col=1
@@ -681,11 +706,11 @@ class FinancialVisualizer:
         # Precio promedio
         fig.add_trace(
             go.Bar(
-                x=summary['frequency'],
-                y=summary['avg_price'],
+                x=frequencies,
+                y=avg_price,
                 name='Precio Promedio',
                 marker_color='#2ecc71',
-                text=[f"${p:.2f}" for p in summary['avg_price']],
+                text=np.char.mod('$%.2f', avg_price),
                 textposition='outside'
             ),
             row=1, col=2
@@ -706,6 +731,7 @@ class FinancialVisualizer:
         
         return fig
     
+    @_memoized_figure
     def create_platform_distribution(self) -> go.Figure:
         """
         Crea un gráfico mostrando la distribución de activos por plataforma.
@@ -713,39 +739,22 @@ class FinancialVisualizer:
         Returns:
             Figura de Plotly
         """
-        assets = self.db.get_all_assets()
-        
-        if not assets:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay datos para visualizar",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
-        
-        # Contar activos por plataforma
-        platform_counts = {}
-        for asset in assets:
-            if asset.get('platforms') and str(asset['platforms']) != 'nan':
-                platforms = [p.strip() for p in str(asset['platforms']).split(',') if p.strip()]
-                for platform in platforms:
-                    platform_counts[platform] = platform_counts.get(platform, 0) + 1
-        
-        if not platform_counts:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No hay activos con plataformas asociadas",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            return fig
+        df = self._load_filtered_df()
+        
+        if df.empty:
+            return self._empty_figure("No hay datos para visualizar")
+        
+        # Contar activos por plataforma: split + explode + value_counts, sin bucles
+        counts = (df['platforms'].astype('string').dropna()
+                  .str.split(',').explode().str.strip()
+                  .loc[lambda p: p.ne('')]
+                  .value_counts())
         
-        # Crear DataFrame para el gráfico
-        platform_df = pd.DataFrame(
-            list(platform_counts.items()),
-            columns=['Plataforma', 'Cantidad']
-        ).sort_values('Cantidad', ascending=False)
+        if counts.empty:
+            return self._empty_figure("No hay activos con plataformas asociadas")
+        
+        # value_counts ya viene ordenado de mayor a menor
+        platform_df = counts.rename_axis('Plataforma').reset_index(name='Cantidad')
         
         # Crear gráfico de barras
         fig = go.Figure()
@@ -796,22 +805,36 @@ if __name__ == "__main__":
     print("\n1. Creando 'La Búsqueda del Tesoro'...")
     fig = visualizer.create_treasure_hunt_scatter()
     
-    # Guardar como HTML para visualización
-    fig.write_html("treasure_hunt.html")
+    # Guardar como HTML para visualización. Los tres HTML comparten un único
+    # plotly.min.js en la misma carpeta en lugar de incrustar ~3.5 MB cada uno.
+    fig.write_html("treasure_hunt.html", include_plotlyjs='directory')
     print("   ✅ Gráfico guardado en 'treasure_hunt.html'")
     print("   👉 Abre el archivo en tu navegador para verlo")
     
     # Crear otros gráficos
     print("\n2. Creando distribución de yields...")
     fig2 = visualizer.create_yield_distribution()
-    fig2.write_html("yield_distribution.html")
+    fig2.write_html("yield_distribution.html", include_plotlyjs='directory')
     print("   ✅ Gráfico guardado en 'yield_distribution.html'")
     
     print("\n3. Creando top performers...")
     fig3 = visualizer.create_top_performers()
-    fig3.write_html("top_performers.html")
+    fig3.write_html("top_performers.html", include_plotlyjs='directory')
     print("   ✅ Gráfico guardado en 'top_performers.html'")
     
+    # Submuestreo: un scatter enorme queda acotado por la grilla
+    print("\n4. Submuestreando un scatter de 25.000 puntos...")
+    rng = np.random.default_rng(0)
+    n_points = 25000
+    big_df = pd.DataFrame({
+        'current_price': rng.uniform(1, 500, n_points),
+        'dividend_yield': rng.uniform(0, 15, n_points),
+        'dividend_frequency': rng.choice(_FREQUENCIES, n_points),
+    })
+    sampled = FinancialVisualizer._downsample_scatter(big_df)
+    assert len(sampled) <= _SCATTER_MAX_POINTS + _SCATTER_KEEP_TOP, len(sampled)
+    print(f"   ✅ {len(big_df)} → {len(sampled)} puntos")
+    
     print("\n" + "=" * 70)
     print("✅ Módulo 4 funcionando correctamente")
     print("=" * 70)
@@ -37,23 +37,92 @@ Estrategia:
 """
 
 import logging
-from typing import Optional, Dict, List
+import logging.handlers
+import atexit
+import queue
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+from typing import Optional, Dict, List, Union
 import sys
 import os
+import re
+from time import perf_counter_ns as _pcn, strftime
+import numpy as np
+import pandas as pd
+
+class _SecondCachedFormatter(logging.Formatter):
+    """
+    Formatter que arma la fecha y hora de `asctime` una sola vez por segundo.
+    
+    Todos los registros del mismo segundo reutilizan el texto; solo se agregan
+    los milisegundos. La salida es idéntica a la de `logging.Formatter`.
+    """
+    _cached_second = None
+    _cached_text = ''
+    
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_text = strftime(self.default_time_format, self.converter(record.created))
+            self._cached_second = second
+        return self.default_msec_format % (self._cached_text, record.msecs)
+
 
 # Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('dividend_hunter.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Los handlers de archivo y consola corren en el hilo del QueueListener: el que
+# loguea solo encola el registro y sigue, sin esperar el formato ni el disco.
+_log_formatter = _SecondCachedFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    # Rota a los 10 MB (5 respaldos); delay: el archivo se abre con el primer registro
+    logging.handlers.RotatingFileHandler('dividend_hunter.log', maxBytes=10 * 1024 * 1024,
+                                         backupCount=5, encoding='utf-8', delay=True),
+    logging.StreamHandler(sys.stdout)
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))  # Solo une mensaje y args
+
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+
+# El formato solo usa asctime, name, levelname y message: no calcular por
+# registro hilo, proceso ni archivo/línea de origen (recorrer el stack)
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging._srcfile = None
+
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # Vacía la cola antes de salir
 
 logger = logging.getLogger(__name__)
 
 
+# Errores esperables al hablar con APIs/red o datos incompletos: se registran sin
+# traceback. requests.RequestException, TimeoutError y ConnectionError heredan de OSError.
+_EXPECTED_API_ERRORS = (OSError, ValueError, KeyError)
+
+# Ticker válido: de 1 a 5 letras o dígitos ASCII (ya en mayúsculas)
+_TICKER_RE = re.compile(r'[A-Z0-9]{1,5}')
+
+
+@lru_cache(maxsize=4096)
+def _is_valid_ticker(symbol: str) -> bool:
+    """
+    Reglas de `ErrorHandler.validate_ticker_symbol` sobre un símbolo ya
+    normalizado (sin espacios, en mayúsculas).
+    
+    Se cachea: el universo de tickers es chico y se re-valida en cada
+    refresco, así que casi todas las llamadas son una búsqueda en el dict.
+    """
+    return _TICKER_RE.fullmatch(symbol) is not None
+
+
 class ErrorHandler:
     """
     Clase utilitaria para manejo centralizado de errores.
@@ -66,17 +135,25 @@ class ErrorHandler:
         """
         Decorador para manejar errores de APIs.
         
+        Ante cualquier error devuelve None. Los errores esperables (red,
+        timeouts, datos faltantes) se registran como aviso sin traceback;
+        solo los inesperados pagan el costo de `exc_info`.
+        
         Args:
             func: Función a decorar
         
         Returns:
             Función decorada con manejo de errores
         """
+        @wraps(func)
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
+            except _EXPECTED_API_ERRORS as e:
+                logger.warning("Error en %s: %s: %s", func.__name__, type(e).__name__, e)
+                return None
             except Exception as e:
-                logger.error(f"Error en {func.__name__}: {e}", exc_info=True)
+                logger.error("Error inesperado en %s: %s", func.__name__, e, exc_info=True)
                 return None
         return wrapper
     
@@ -91,19 +168,11 @@ class ErrorHandler:
         Returns:
             True si es válido, False en caso contrario
         """
-        if not symbol or not isinstance(symbol, str):
-            return False
-        
-        symbol = symbol.strip().upper()
-        
-        # Validaciones básicas
-        if len(symbol) < 1 or len(symbol) > 5:
-            return False
-        
-        if not symbol.isalnum():
+        # Normalizar antes de la caché: "aapl", "AAPL " y "AAPL" comparten entrada
+        try:
+            return _is_valid_ticker(symbol.strip().upper())
+        except (AttributeError, TypeError):  # None, números, bytes: no son texto
             return False
-        
-        return True
     
     @staticmethod
     def safe_float_conversion(value, default: float = 0.0) -> float:
@@ -120,8 +189,31 @@ class ErrorHandler:
         try:
             return float(value)
         except (ValueError, TypeError):
-            logger.warning(f"No se pudo convertir {value} a float, usando {default}")
+            logger.warning("No se pudo convertir %r a float, usando %s", value, default)
             return default
+    
+    @staticmethod
+    def safe_float_array(values, default: float = 0.0) -> np.ndarray:
+        """
+        Versión por lotes de `safe_float_conversion`.
+        
+        Convierte toda la secuencia en una pasada (`pd.to_numeric` con
+        `errors='coerce'`); lo que no se puede convertir, o es NaN, queda
+        con `default`. Se registra un único aviso con la cantidad.
+        
+        Args:
+            values: Secuencia, Series o array de valores
+            default: Valor para los que no se pueden convertir
+        
+        Returns:
+            Array float64 del mismo largo
+        """
+        converted = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        invalid = np.isnan(converted)
+        if invalid.any():
+            logger.warning("%d valores no se pudieron convertir a float, usando %s", invalid.sum(), default)
+            converted = np.where(invalid, default, converted)
+        return converted
 
 
 class Config:
@@ -136,6 +228,7 @@ class Config:
     
     # yfinance
     YFINANCE_TIMEOUT = int(os.getenv("YFINANCE_TIMEOUT", "10"))
+    MAX_FETCH_WORKERS = int(os.getenv("MAX_FETCH_WORKERS", "16"))  # Descargas simultáneas
     
     # Análisis
     LOOKBACK_MONTHS = int(os.getenv("LOOKBACK_MONTHS", "12"))
@@ -151,6 +244,19 @@ class Config:
     CHART_HEIGHT = int(os.getenv("CHART_HEIGHT", "600"))
 
 
+@dataclass(frozen=True, slots=True)
+class AssetMetrics:
+    """
+    Métricas mínimas de un activo para validar, sin diccionario por instancia.
+    
+    Alternativa liviana al dict de métricas cuando solo interesan estos tres
+    campos: los atributos se leen por slot, sin hashear claves.
+    """
+    symbol: str
+    current_price: float
+    dividend_yield: float
+
+
 class DataValidator:
     """
     Clase para validar datos financieros.
@@ -159,56 +265,109 @@ class DataValidator:
     """
     
     @staticmethod
-    def validate_asset_metrics(metrics: Dict) -> bool:
+    def validate_asset_metrics(metrics: Union[Dict, AssetMetrics]) -> bool:
         """
         Valida que las métricas de un activo sean válidas.
         
         Args:
-            metrics: Diccionario con métricas
+            metrics: Diccionario con métricas o `AssetMetrics`
         
         Returns:
             True si es válido, False en caso contrario
         """
-        if not metrics:
-            logger.warning("Métricas vacías o None")
-            return False
-        
-        required_fields = ['symbol', 'current_price', 'dividend_yield']
-        
-        for field in required_fields:
-            if field not in metrics:
-                logger.warning(f"Campo requerido faltante: {field}. Métricas: {list(metrics.keys())}")
+        if isinstance(metrics, AssetMetrics):
+            # Los campos siempre existen: se leen directo de los slots
+            symbol = metrics.symbol
+            price = metrics.current_price
+            yield_val = metrics.dividend_yield
+        else:
+            if not metrics:
+                logger.warning("Métricas vacías o None")
                 return False
+            
+            required_fields = ['symbol', 'current_price', 'dividend_yield']
+            
+            for field in required_fields:
+                if field not in metrics:
+                    logger.warning("Campo requerido faltante: %s. Métricas: %s", field, list(metrics))
+                    return False
+            
+            # Una sola búsqueda por campo; de acá en adelante solo variables locales
+            symbol = metrics['symbol']
+            price = metrics['current_price']
+            yield_val = metrics['dividend_yield']
         
         # Validar tipos y rangos
-        if not isinstance(metrics['symbol'], str) or not metrics['symbol']:
-            logger.warning(f"Símbolo inválido: {metrics.get('symbol')}")
+        if not isinstance(symbol, str) or not symbol:
+            logger.warning("Símbolo inválido: %r", symbol)
             return False
         
-        # Validar precio (puede ser None, pero si existe debe ser > 0)
-        price = metrics.get('current_price')
         if price is None:
-            logger.warning(f"Precio es None para {metrics.get('symbol')}")
+            logger.warning("Precio es None para %s", symbol)
             return False
         
-        price = ErrorHandler.safe_float_conversion(price, default=-1.0)
-        if price <= 0:
-            logger.warning(f"Precio inválido: {price} para {metrics.get('symbol')}")
+        if yield_val is None:
+            logger.warning("Yield es None para %s", symbol)
             return False
         
-        # Validar yield (puede ser 0, pero debe estar en rango válido)
-        yield_val = metrics.get('dividend_yield')
-        if yield_val is None:
-            logger.warning(f"Yield es None para {metrics.get('symbol')}")
+        # Ambas conversiones en un solo try (si ya son float no cuesta nada)
+        try:
+            price = float(price)
+            yield_val = float(yield_val)
+        except (TypeError, ValueError):
+            logger.warning("Precio o yield no numérico para %s: %r / %r",
+                           symbol, price, yield_val)
+            return False
+        
+        # Precio > 0; yield puede ser 0, pero debe estar en rango válido
+        if price <= 0:
+            logger.warning("Precio inválido: %s para %s", price, symbol)
             return False
         
-        yield_val = ErrorHandler.safe_float_conversion(yield_val, default=-1.0)
         if yield_val < 0 or yield_val > 100:  # Yield razonable entre 0-100%
-            logger.warning(f"Yield fuera de rango: {yield_val} para {metrics.get('symbol')}")
+            logger.warning("Yield fuera de rango: %s para %s", yield_val, symbol)
             return False
         
-        logger.debug(f"✅ Métricas validadas correctamente para {metrics.get('symbol')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("✅ Métricas validadas correctamente para %s", symbol)
         return True
+    
+    @staticmethod
+    def validate_asset_metrics_batch(df: pd.DataFrame) -> np.ndarray:
+        """
+        Valida las métricas de muchos activos a la vez.
+        
+        Aplica las mismas reglas que `validate_asset_metrics` pero por columnas
+        (símbolo texto no vacío, precio > 0, yield entre 0 y 100), sin recorrer
+        filas en Python. Los valores no numéricos cuentan como inválidos.
+        Se registra un único aviso con el total de rechazados.
+        
+        Args:
+            df: DataFrame con columnas symbol, current_price y dividend_yield
+        
+        Returns:
+            Array booleano alineado con las filas de `df` (True = válido)
+        """
+        required_fields = ['symbol', 'current_price', 'dividend_yield']
+        missing = [field for field in required_fields if field not in df.columns]
+        if missing:
+            logger.warning("Campos requeridos faltantes: %s. Columnas: %s", missing, list(df.columns))
+            return np.zeros(len(df), dtype=bool)
+        
+        # .str.len() da NaN para lo que no es texto (None, números)
+        try:
+            valid_symbol = df['symbol'].str.len().gt(0)
+        except AttributeError:  # Columna sin ningún texto
+            valid_symbol = pd.Series(False, index=df.index)
+        
+        price = pd.to_numeric(df['current_price'], errors='coerce')
+        yield_val = pd.to_numeric(df['dividend_yield'], errors='coerce')
+        mask = (valid_symbol & price.gt(0) & yield_val.between(0, 100)).to_numpy(dtype=bool)
+        
+        invalid_count = len(mask) - int(mask.sum())
+        if invalid_count:
+            logger.warning("%d de %d activos con métricas inválidas", invalid_count, len(mask))
+        return mask
 
 
 class PerformanceMonitor:
@@ -229,13 +388,12 @@ class PerformanceMonitor:
         Returns:
             Función decorada con medición de tiempo
         """
-        import time
-        
-        def wrapper(*args, **kwargs):
-            start_time = time.time()
+        # perf_counter_ns: monotónico y de alta resolución; como default queda local
+        def wrapper(*args, _pcn=_pcn, **kwargs):
+            start_time = _pcn()
             result = func(*args, **kwargs)
-            elapsed_time = time.time() - start_time
-            logger.info(f"{func.__name__} ejecutado en {elapsed_time:.2f}s")
+            elapsed_time = (_pcn() - start_time) * 1e-9
+            logger.info("%s ejecutado en %.2fs", func.__name__, elapsed_time)
             return result
         return wrapper
 
@@ -248,6 +406,9 @@ def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> f
     """
     División segura que evita división por cero.
     
+    Si alguno de los operandos es un array de numpy delega en
+    `safe_divide_array` y devuelve un array.
+    
     Args:
         numerator: Numerador
         denominator: Denominador
@@ -256,16 +417,55 @@ def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> f
     Returns:
         Resultado de la división o valor por defecto
     """
+    if isinstance(numerator, np.ndarray) or isinstance(denominator, np.ndarray):
+        return safe_divide_array(numerator, denominator, default)
     try:
         if denominator == 0:
-            logger.warning(f"División por cero evitada: {numerator} / {denominator}")
+            logger.warning("División por cero evitada: %s / %s", numerator, denominator)
             return default
         return numerator / denominator
     except Exception as e:
-        logger.error(f"Error en división: {e}")
+        logger.error("Error en división: %s", e)
         return default
 
 
+def safe_divide_array(numerator, denominator, default: float = 0.0) -> np.ndarray:
+    """
+    División segura elemento a elemento sobre arrays.
+    
+    Un único `np.divide` con `where`: donde el denominador es 0 queda
+    `default`, sin recorrer los elementos en Python.
+    
+    Args:
+        numerator: Array (o escalar) de numeradores
+        denominator: Array (o escalar) de denominadores
+        default: Valor donde el denominador es 0
+    
+    Returns:
+        Array float64 con la forma de los operandos combinados
+    """
+    num, den = np.broadcast_arrays(np.asarray(numerator, dtype=np.float64),
+                                   np.asarray(denominator, dtype=np.float64))
+    zero = den == 0
+    if zero.any():
+        logger.warning("División por cero evitada en %d elementos", zero.sum())
+    out = np.full(num.shape, default, dtype=np.float64)
+    np.divide(num, den, out=out, where=~zero)
+    return out
+
+
+@lru_cache(maxsize=None)
+def _currency_formatter(decimals: int):
+    """`str.format` ligado para moneda con `decimals` decimales (se arma una vez)."""
+    return ("${:,.%df}" % decimals).format
+
+
+@lru_cache(maxsize=None)
+def _percentage_formatter(decimals: int):
+    """`str.format` ligado para porcentaje con `decimals` decimales (se arma una vez)."""
+    return ("{:.%df}%%" % decimals).format
+
+
 def format_currency(value: float, decimals: int = 2) -> str:
     """
     Formatea un valor como moneda.
@@ -278,9 +478,9 @@ def format_currency(value: float, decimals: int = 2) -> str:
         String formateado (ej: "$123.45")
     """
     try:
-        return f"${value:,.{decimals}f}"
+        return _currency_formatter(decimals)(value)
     except Exception as e:
-        logger.error(f"Error formateando moneda: {e}")
+        logger.error("Error formateando moneda: %s", e)
         return "$0.00"
 
 
@@ -296,12 +496,46 @@ def format_percentage(value: float, decimals: int = 2) -> str:
         String formateado (ej: "12.34%")
     """
     try:
-        return f"{value:.{decimals}f}%"
+        return _percentage_formatter(decimals)(value)
     except Exception as e:
-        logger.error(f"Error formateando porcentaje: {e}")
+        logger.error("Error formateando porcentaje: %s", e)
         return "0.00%"
 
 
+def format_currency_series(values: pd.Series, decimals: int = 2) -> pd.Series:
+    """
+    Versión por columnas de `format_currency`.
+    
+    Usa el mismo `str.format` ligado para todos los valores con `Series.map`,
+    sin una llamada a `format_currency` (ni su try/except) por fila. Lo que no
+    es numérico queda como "$0.00", igual que en la versión escalar.
+    
+    Args:
+        values: Series con los valores
+        decimals: Número de decimales
+    
+    Returns:
+        Series de strings alineada con `values`
+    """
+    fmt = _currency_formatter(decimals)
+    return pd.to_numeric(values, errors='coerce').map(fmt, na_action='ignore').fillna(fmt(0))
+
+
+def format_percentage_series(values: pd.Series, decimals: int = 2) -> pd.Series:
+    """
+    Versión por columnas de `format_percentage`.
+    
+    Args:
+        values: Series con los valores
+        decimals: Número de decimales
+    
+    Returns:
+        Series de strings alineada con `values` ("0.00%" para no numéricos)
+    """
+    fmt = _percentage_formatter(decimals)
+    return pd.to_numeric(values, errors='coerce').map(fmt, na_action='ignore').fillna(fmt(0))
+
+
 # ============================================================================
 # EJEMPLO DE USO
 # ============================================================================
@@ -333,6 +567,7 @@ if __name__ == "__main__":
     print("\n3. Formateo de valores...")
     print(f"   Moneda: {format_currency(1234.567)}")
     print(f"   Porcentaje: {format_percentage(12.3456)}")
+    print(f"   Columna: {format_currency_series(pd.Series([1234.5, None, 7])).tolist()}")
     
     # Test de validación de métricas
     print("\n4. Validando métricas de activo...")
@@ -349,6 +584,8 @@ if __name__ == "__main__":
     
     print(f"   Métricas válidas: {DataValidator.validate_asset_metrics(valid_metrics)}")
     print(f"   Métricas inválidas: {DataValidator.validate_asset_metrics(invalid_metrics)}")
+    batch_mask = DataValidator.validate_asset_metrics_batch(pd.DataFrame([valid_metrics, invalid_metrics]))
+    print(f"   En lote: {batch_mask.tolist()}")
     
     # Mostrar configuración
     print("\n5. Configuración actual:")